@@ -0,0 +1,121 @@
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+from rest_framework.authentication import TokenAuthentication
+
+from . import versions
+
+logger = logging.getLogger(__name__)
+
+
+def freeze(instance):
+    return tuple(
+        getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+    )
+
+
+def thaw(model, values):
+    return model.from_db(
+        router.db_for_read(model),
+        [field.attname for field in model._meta.concrete_fields],
+        values,
+    )
+
+
+class TokenCache:
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if (
+            entry is None
+            or entry[0] < time.monotonic()
+            or entry[1]['version'] != versions.get_version(
+                versions.auth(entry[1]['user_id'])
+            )
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, snapshot, generation):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, snapshot)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key=None, user_id=None):
+        with self.lock:
+            self.generation += 1
+            if key is not None:
+                self.entries.pop(key, None)
+            if user_id is not None:
+                for stale in [
+                    key for key, (_, snapshot) in self.entries.items()
+                    if snapshot['user_id'] == user_id
+                ]:
+                    del self.entries[stale]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self.entries),
+        }
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+def forget(key=None, user_id=None):
+    transaction.on_commit(
+        lambda: token_cache.discard(key=key, user_id=user_id)
+    )
+    if user_id is not None:
+        versions.touch(versions.auth(user_id))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        if not settings.TOKEN_CACHE_ENABLED:
+            return super().authenticate_credentials(key)
+        snapshot = token_cache.get(key)
+        if snapshot is not None:
+            user = thaw(get_user_model(), snapshot['user'])
+            token = thaw(self.get_model(), snapshot['token'])
+            token.user = user
+            return user, token
+        generation = token_cache.generation
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, {
+            'user_id': user.pk,
+            'version': versions.get_version(versions.auth(user.pk)),
+            'user': freeze(user),
+            'token': freeze(token),
+        }, generation)
+        logger.debug('Token cache: %s', token_cache.stats())
+        return user, token
@@ -0,0 +1,101 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import versions
+
+RENDER_FORMAT_VERSION = 2
+GENERATION_KEY = 'recipe-render:generation'
+VERSION_KEY = 'recipe-render:version:{}'
+
+
+class RecipeRenderCache:
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def generation(self):
+        generation = self.cache.get(GENERATION_KEY)
+        if generation is None:
+            generation = uuid4().hex
+            self.cache.add(GENERATION_KEY, generation, timeout=None)
+            generation = self.cache.get(GENERATION_KEY, generation)
+        return generation
+
+    @staticmethod
+    def make_key(recipe_id, generation, version):
+        return 'recipe-render:{}:{}:{}:{}'.format(
+            RENDER_FORMAT_VERSION, generation, recipe_id, version
+        )
+
+    @staticmethod
+    def version_key(recipe_id):
+        return VERSION_KEY.format(recipe_id)
+
+    def versions(self, recipe_ids):
+        keys = {self.version_key(pk): pk for pk in recipe_ids}
+        found = self.cache.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        for key in missing:
+            self.cache.add(key, uuid4().hex, timeout=None)
+        if missing:
+            found.update(self.cache.get_many(missing))
+        return {keys[key]: version for key, version in found.items()}
+
+    def get_many(self, recipe_ids):
+        generation = self.generation()
+        keys = {
+            pk: self.make_key(pk, generation, version)
+            for pk, version in self.versions(recipe_ids).items()
+        }
+        found = self.cache.get_many(list(keys.values()))
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return {
+            pk: found[key] for pk, key in keys.items() if key in found
+        }, keys
+
+    def set_many(self, rendered, keys):
+        self.cache.set_many({
+            keys[pk]: data for pk, data in rendered.items() if pk in keys
+        })
+
+    def invalidate(self, recipe_ids):
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+        transaction.on_commit(lambda: self.cache.delete_many([
+            self.version_key(pk) for pk in recipe_ids
+        ]))
+
+    def invalidate_all(self):
+        transaction.on_commit(lambda: self.cache.set(
+            GENERATION_KEY, uuid4().hex, timeout=None
+        ))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+recipe_cache = RecipeRenderCache(settings.RECIPE_RENDER_CACHE)
+
+
+def recipes_changed(recipe_ids=None):
+    if recipe_ids is None:
+        recipe_cache.invalidate_all()
+    else:
+        recipe_cache.invalidate(recipe_ids)
+    versions.touch(versions.RECIPES)
@@ -0,0 +1,75 @@
+from hashlib import sha1
+
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from . import versions
+
+CONDITIONAL_ACTIONS = ('list', 'retrieve')
+
+
+class NotModified(Exception):
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    data_versions = ()
+    viewer_dependent = False
+    cache_control = {'no_cache': True}
+
+    def get_version_stamps(self, request):
+        stamps = [versions.get_version(name) for name in self.data_versions]
+        if self.viewer_dependent and request.user.is_authenticated:
+            stamps.append(
+                versions.get_version(versions.viewer(request.user.id))
+            )
+        return stamps
+
+    def get_etag_extra(self, request):
+        return []
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        if (
+            request.method not in ('GET', 'HEAD')
+            or self.action not in CONDITIONAL_ACTIONS
+        ):
+            return
+        stamps = self.get_version_stamps(request)
+        self.etag = quote_etag(sha1('|'.join(
+            [request.build_absolute_uri()]
+            + [repr(part) for part in stamps + self.get_etag_extra(request)]
+        ).encode('utf-8')).hexdigest())
+        self.last_modified = int(max(stamps)) if stamps else None
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(self, 'etag', None) is None:
+            return response
+        if response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            if self.last_modified is not None:
+                response['Last-Modified'] = http_date(self.last_modified)
+        if self.viewer_dependent:
+            patch_vary_headers(response, ('Authorization',))
+            patch_cache_control(response, private=True)
+        patch_cache_control(response, **self.cache_control)
+        return response
@@ -0,0 +1,152 @@
+import logging
+from datetime import timedelta
+from hashlib import sha1
+from tempfile import TemporaryFile
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+
+from recipes.models import ExportJob, ShoppingListItem
+from . import versions, workers
+from .shopping_list import shopping_list, write_export
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMAT_VERSION = 1
+ACTIVE_STATUSES = (ExportJob.PENDING, ExportJob.RUNNING)
+
+
+def cart_fingerprint(user):
+    digest = sha1('{}|{}'.format(
+        EXPORT_FORMAT_VERSION, versions.get_version(versions.INGREDIENTS)
+    ).encode('utf-8'))
+    for ingredient_id, amount in ShoppingListItem.objects.filter(
+        user=user
+    ).order_by('ingredient_id').values_list('ingredient_id', 'amount'):
+        digest.update(f'|{ingredient_id}:{amount}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def stale_claim():
+    return timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+
+
+def claimable_jobs():
+    return ExportJob.objects.filter(
+        Q(status=ExportJob.PENDING)
+        | Q(status=ExportJob.RUNNING, claimed__lt=stale_claim())
+    )
+
+
+def valid_jobs():
+    return ExportJob.objects.filter(
+        Q(status__in=ACTIVE_STATUSES)
+        | Q(finished__gte=timezone.now() - timedelta(
+            seconds=settings.EXPORT_RESULT_TTL
+        ))
+    )
+
+
+def cleanup_expired():
+    expired = ExportJob.objects.exclude(
+        status__in=ACTIVE_STATUSES
+    ).exclude(id__in=valid_jobs().values('id'))
+    for job in expired.exclude(file=''):
+        job.file.delete(save=False)
+    expired.delete()
+
+
+def dispatch():
+    transaction.on_commit(lambda: workers.submit(process_pending))
+
+
+def enqueue_export(user, export_format):
+    cleanup_expired()
+    fingerprint = cart_fingerprint(user)
+    job = valid_jobs().filter(
+        user=user, format=export_format, fingerprint=fingerprint
+    ).exclude(status=ExportJob.FAILED).order_by('-created').first()
+    if job is not None:
+        return job
+    if ExportJob.objects.filter(
+        status__in=ACTIVE_STATUSES
+    ).count() >= settings.EXPORT_MAX_PENDING:
+        raise Throttled(
+            detail='Слишком много выгрузок в очереди, попробуйте позже'
+        )
+    job = ExportJob.objects.create(
+        user=user, format=export_format, fingerprint=fingerprint
+    )
+    dispatch()
+    return job
+
+
+def fail_abandoned():
+    ExportJob.objects.filter(
+        status=ExportJob.RUNNING,
+        claimed__lt=stale_claim(),
+        attempts__gte=settings.EXPORT_MAX_ATTEMPTS,
+    ).update(
+        status=ExportJob.FAILED,
+        error='Выгрузка не завершилась за отведенное время',
+        finished=timezone.now(),
+    )
+
+
+def claim_job():
+    fail_abandoned()
+    for job_id in claimable_jobs().order_by('created').values_list(
+        'id', flat=True
+    )[:settings.BACKGROUND_WORKERS + 1]:
+        claim = uuid4().hex
+        if claimable_jobs().filter(id=job_id).update(
+            status=ExportJob.RUNNING,
+            claim=claim,
+            claimed=timezone.now(),
+            attempts=F('attempts') + 1,
+        ):
+            job = ExportJob.objects.select_related('user').filter(
+                id=job_id, claim=claim
+            ).first()
+            if job is not None:
+                return job
+    return None
+
+
+def process_pending():
+    processed = 0
+    job = claim_job()
+    while job is not None:
+        run_export(job)
+        processed += 1
+        job = claim_job()
+    return processed
+
+
+def run_export(job):
+    try:
+        with TemporaryFile() as output:
+            write_export(shopping_list(job.user), job.format, output)
+            output.seek(0)
+            job.file.save(
+                f'{uuid4().hex}.{job.format}', File(output), save=False
+            )
+        job.status = ExportJob.DONE
+    except Exception as error:
+        logger.exception('Выгрузка %s завершилась с ошибкой', job.id)
+        job.status = ExportJob.FAILED
+        job.error = str(error)
+    if not ExportJob.objects.filter(
+        id=job.id, status=ExportJob.RUNNING, claim=job.claim
+    ).update(
+        file=job.file.name or '',
+        status=job.status,
+        error=job.error,
+        finished=timezone.now(),
+    ) and job.file:
+        job.file.delete(save=False)
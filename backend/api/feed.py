@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+
+from recipes.models import Recipe, Timeline, TimelineEntry
+from recipes.timeline import build_timeline
+from users.models import Follow, User
+from . import workers
+
+FEED_FIELDS = ('recipe_id', 'pub_date')
+
+
+def feed_state(user):
+    return User.objects.filter(id=user.id).annotate(
+        following=Count('follower')
+    ).values('following', 'timeline__ready').get()
+
+
+def schedule_build(user_id):
+    _, created = Timeline.objects.get_or_create(user_id=user_id)
+    if created:
+        transaction.on_commit(lambda: workers.submit(build_timeline, user_id))
+
+
+def feed_rows(user):
+    state = feed_state(user)
+    if state['timeline__ready']:
+        return TimelineEntry.objects.filter(user=user).values(*FEED_FIELDS)
+    if (
+        state['timeline__ready'] is None
+        and state['following'] >= settings.FEED_TIMELINE_THRESHOLD
+    ):
+        schedule_build(user.id)
+    return Recipe.objects.filter(
+        author_id__in=Follow.objects.filter(user=user).values('author_id')
+    ).annotate(recipe_id=F('id')).values(*FEED_FIELDS)
@@ -0,0 +1,135 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+from .cache import recipes_changed
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS = (
+    ('thumbnail', 320),
+    ('card', 720),
+    ('full', 1600),
+)
+IMAGE_FORMATS = (
+    ('webp', 'WEBP', 'webp'),
+    ('jpeg', 'JPEG', 'jpg'),
+)
+VARIANT_QUALITY = 80
+VARIANTS_DIR = 'recipes/variants/'
+BASE64_HEADER = ';base64,'
+
+
+class LimitedBase64ImageField(Base64ImageField):
+    default_error_messages = {
+        'too_large': 'Размер изображения не должен превышать {limit} МБ',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            payload = data.partition(BASE64_HEADER)[2] or data
+            if len(payload) * 3 // 4 > settings.RECIPE_IMAGE_MAX_SIZE:
+                self.fail(
+                    'too_large',
+                    limit='{:g}'.format(
+                        settings.RECIPE_IMAGE_MAX_SIZE / (1024 * 1024)
+                    ),
+                )
+        return super().to_internal_value(data)
+
+
+def get_storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def variants_ready(image, variants):
+    return bool(image) and variants.get('source') == image
+
+
+def variant_urls(image, variants, storage):
+    if not image:
+        return None
+    if not variants_ready(image, variants):
+        original = storage.url(image)
+        return {
+            name: {key: original for key, _, _ in IMAGE_FORMATS}
+            for name, _ in IMAGE_VARIANTS
+        }
+    return {
+        name: {
+            key: storage.url(variants[name][key])
+            for key, _, _ in IMAGE_FORMATS
+        }
+        for name, _ in IMAGE_VARIANTS
+    }
+
+
+def absolute_variant_urls(urls, request):
+    return {
+        name: {
+            key: request.build_absolute_uri(url)
+            for key, url in formats.items()
+        }
+        for name, formats in urls.items()
+    }
+
+
+def variant_files(variants):
+    return [
+        variants[name][key]
+        for name, _ in IMAGE_VARIANTS if name in variants
+        for key, _, _ in IMAGE_FORMATS if key in variants[name]
+    ]
+
+
+def open_source(storage, source):
+    with storage.open(source) as file:
+        image = Image.open(file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def save_variants(storage, source, image):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    variants = {}
+    for name, size in IMAGE_VARIANTS:
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variants[name] = {}
+        for key, image_format, extension in IMAGE_FORMATS:
+            output = BytesIO()
+            resized.save(
+                output, image_format, quality=VARIANT_QUALITY, optimize=True
+            )
+            variants[name][key] = storage.save(
+                f'{VARIANTS_DIR}{stem}_{name}.{extension}',
+                ContentFile(output.getvalue()),
+            )
+    return variants
+
+
+def generate_variants(recipe_id, source):
+    storage = get_storage()
+    variants = save_variants(storage, source, open_source(storage, source))
+    previous = Recipe.objects.filter(id=recipe_id).values_list(
+        'image_variants', flat=True
+    ).first()
+    updated = Recipe.objects.filter(id=recipe_id, image=source).update(
+        image_variants=dict(variants, source=source)
+    )
+    if updated:
+        recipes_changed([recipe_id])
+    for name in variant_files((previous if updated else variants) or {}):
+        storage.delete(name)
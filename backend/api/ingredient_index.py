@@ -0,0 +1,66 @@
+import threading
+from bisect import bisect_left
+
+from recipes.models import Ingredient
+from . import versions
+
+PREFIX_END = '\uffff'
+
+
+def fold(text):
+    return text.strip().lower().replace('ё', 'е')
+
+
+class IngredientIndex:
+
+    def __init__(self, rows):
+        entries = sorted(
+            (fold(name), pk, name, measurement_unit)
+            for pk, name, measurement_unit in rows
+        )
+        self.keys = tuple(entry[0] for entry in entries)
+        self.items = tuple(
+            (pk, name, measurement_unit)
+            for _, pk, name, measurement_unit in entries
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, query, limit):
+        query = fold(query)
+        if not query:
+            return []
+        start = bisect_left(self.keys, query)
+        end = min(bisect_left(self.keys, query + PREFIX_END), start + limit)
+        positions = list(range(start, end))
+        if len(positions) < limit:
+            for position, key in enumerate(self.keys):
+                if query in key and not key.startswith(query):
+                    positions.append(position)
+                    if len(positions) == limit:
+                        break
+        return [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for pk, name, measurement_unit in map(
+                self.items.__getitem__, positions
+            )
+        ]
+
+
+_index = None
+_index_version = None
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index, _index_version
+    version = versions.get_version(versions.INGREDIENTS)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = IngredientIndex(Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                ))
+                _index_version = version
+    return _index
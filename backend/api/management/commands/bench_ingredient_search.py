@@ -0,0 +1,51 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ingredient_index import IngredientIndex, get_index
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает поиск ингредиентов по префиксу через индекс '
+            'в памяти и через запрос к базе')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError('В базе нет ингредиентов')
+        random.seed(0)
+        queries = [
+            random.choice(names)[:random.randint(1, 4)]
+            for _ in range(options['queries'])
+        ]
+
+        started = time.perf_counter()
+        rows = Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+        IngredientIndex(rows)
+        self.stdout.write(
+            f'построение индекса: {(time.perf_counter() - started) * 1e3:.1f}'
+            f' мс на {len(names)} ингредиентов'
+        )
+
+        index = get_index()
+        started = time.perf_counter()
+        for query in queries:
+            index.search(query, options['limit'])
+        self.report('индекс', started, len(queries))
+
+        started = time.perf_counter()
+        for query in queries:
+            list(Ingredient.objects.filter(name__istartswith=query).values(
+                'id', 'name', 'measurement_unit'
+            ))
+        self.report('база (^name)', started, len(queries))
+
+    def report(self, name, started, count):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{name}: {elapsed / count * 1e6:.1f} мкс на запрос')
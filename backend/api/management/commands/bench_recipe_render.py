@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.rendering import render_instances, render_rows
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает затраты CPU на рецепт для сериализатора '
+            'и быстрого рендера из values()')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        recipe_ids = list(
+            Recipe.objects.values_list('id', flat=True)[:options['recipes']]
+        )
+        if not recipe_ids:
+            raise CommandError('В базе нет рецептов')
+
+        for name, render in (('serializer', render_instances),
+                             ('values', render_rows)):
+            started = time.process_time()
+            for _ in range(options['repeat']):
+                render(recipe_ids)
+            elapsed = time.process_time() - started
+            per_recipe = elapsed / (options['repeat'] * len(recipe_ids))
+            self.stdout.write(
+                f'{name}: {per_recipe * 1e6:.1f} мкс CPU на рецепт'
+            )
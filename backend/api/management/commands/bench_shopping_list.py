@@ -0,0 +1,46 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+
+from api.shopping_list import register_font, render_pdf
+
+DEFAULT_SIZES = (10, 500, 5000)
+
+
+class Command(BaseCommand):
+    help = ('Измеряет время генерации PDF списка покупок '
+            'для разного числа строк')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=DEFAULT_SIZES
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        register_font()
+        self.stdout.write(
+            f'регистрация шрифта: '
+            f'{(time.perf_counter() - started) * 1000:.1f} мс'
+        )
+        for size in options['rows']:
+            rows = [
+                {
+                    'name': f'Ингредиент {number}',
+                    'measurement_unit': 'г',
+                    'amount': number,
+                }
+                for number in range(size)
+            ]
+            timings = []
+            for _ in range(options['repeat']):
+                output = BytesIO()
+                started = time.perf_counter()
+                pages = render_pdf(rows, output)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f'{size} строк: {min(timings) * 1000:.1f} мс, '
+                f'{pages} стр., {len(output.getvalue()) // 1024} КБ'
+            )
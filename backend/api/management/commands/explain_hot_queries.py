@@ -0,0 +1,225 @@
+import random
+import re
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.http import QueryDict
+
+from api.filters import RecipeFilter
+from api.shopping_list import shopping_list
+from recipes.aggregates import expected_totals
+from recipes.counters import counter_drift, recount
+from recipes.models import (Favorites,
+                            Ingredient,
+                            IngredientAmount,
+                            Recipe,
+                            ShoppingCart,
+                            ShoppingListItem,
+                            Tag)
+from users.models import Follow, User
+
+LARGE_TABLES = (
+    Recipe._meta.db_table,
+    Recipe.tags.through._meta.db_table,
+    IngredientAmount._meta.db_table,
+    Favorites._meta.db_table,
+    ShoppingCart._meta.db_table,
+    ShoppingListItem._meta.db_table,
+    Follow._meta.db_table,
+)
+PAGE_SIZE = 6
+SEED_USERS = 500
+SEED_INGREDIENTS_PER_RECIPE = 5
+SEED_RELATIONS = 50
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN для горячих запросов и завершается ошибкой, '
+            'если план содержит последовательное сканирование большой '
+            'таблицы')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Создать указанное число рецептов во временной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        if options['seed'] < 0:
+            raise CommandError('--seed должен быть неотрицательным')
+        with transaction.atomic():
+            if options['seed']:
+                user = self.seed(options['seed'])
+            else:
+                user = User.objects.order_by('id').first()
+            if user is None:
+                raise CommandError('В базе нет пользователей, '
+                                   'используйте --seed')
+            self.analyze()
+            failures = []
+            for name, queryset in self.hot_queries(user):
+                plan = queryset.explain()
+                scans = self.sequential_scans(plan)
+                status = 'SEQ SCAN ' + ', '.join(scans) if scans else 'ok'
+                self.stdout.write(f'{name}: {status}')
+                if options['verbosity'] > 1 or scans:
+                    self.stdout.write(plan)
+                if scans:
+                    failures.append(name)
+            transaction.set_rollback(bool(options['seed']))
+        if failures:
+            raise CommandError(
+                'Последовательное сканирование: ' + ', '.join(failures)
+            )
+
+    def hot_queries(self, user):
+        author = (
+            Recipe.objects.order_by('-pub_date', '-id')
+            .values_list('author_id', flat=True).first()
+        )
+        tags = QueryDict(mutable=True)
+        tags.setlist('tags', Tag.objects.values_list('slug', flat=True)[:2])
+        filtered = tags.copy()
+        filtered['is_favorited'] = '1'
+        request = SimpleNamespace(user=user)
+
+        def recipe_filter(data):
+            return RecipeFilter(
+                data, queryset=Recipe.objects.all(), request=request
+            ).qs.order_by('-pub_date', '-id')[:PAGE_SIZE]
+
+        page_ids = list(
+            Recipe.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)[:PAGE_SIZE]
+        )
+        return (
+            ('feed', Recipe.objects.order_by('-pub_date', '-id')[:PAGE_SIZE]),
+            ('feed by tags', recipe_filter(tags)),
+            ('feed by tags and favorites', recipe_filter(filtered)),
+            ('author page', Recipe.objects.filter(
+                author_id=author
+            ).order_by('-pub_date', '-id')[:PAGE_SIZE]),
+            ('page ingredients', IngredientAmount.objects.filter(
+                recipe_id__in=page_ids
+            ).select_related('ingredient')),
+            ('page tags', Recipe.tags.through.objects.filter(
+                recipe_id__in=page_ids
+            ).select_related('tag')),
+            ('shopping list', shopping_list(user)),
+            ('subscriptions', User.objects.filter(
+                followed__user=user
+            ).order_by('id')[:PAGE_SIZE]),
+            ('author recipes count', Recipe.objects.filter(
+                author_id=author
+            ).values('author_id').annotate(total=Count('id'))),
+        )
+
+    @staticmethod
+    def sequential_scans(plan):
+        if connection.vendor == 'postgresql':
+            pattern = r'Seq Scan on (\w+)'
+        else:
+            pattern = r'\bSCAN (?:TABLE )?(\w+)\b(?! USING)'
+        return sorted({
+            table for table in re.findall(pattern, plan)
+            if table in LARGE_TABLES
+        })
+
+    @staticmethod
+    def analyze():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for table in LARGE_TABLES:
+                    cursor.execute(f'ANALYZE {table}')
+            else:
+                cursor.execute('ANALYZE')
+
+    def seed(self, count):
+        random.seed(0)
+        users = User.objects.bulk_create(
+            User(
+                username=f'explain_{i}',
+                email=f'explain_{i}@example.com',
+                first_name='Explain',
+                last_name=str(i),
+            )
+            for i in range(SEED_USERS)
+        )
+        if not users[0].pk:
+            users = list(User.objects.filter(
+                username__startswith='explain_'
+            ).order_by('id'))
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=f'tag {i}', color='#000000', slug=f'explain-{i}')
+                for i in range(3)
+            )
+        tags = list(Tag.objects.values_list('id', flat=True))
+        ingredients = list(Ingredient.objects.values_list('id', flat=True))
+        if len(ingredients) < SEED_INGREDIENTS_PER_RECIPE:
+            Ingredient.objects.bulk_create(
+                Ingredient(name=f'explain {i}', measurement_unit='г')
+                for i in range(100)
+            )
+            ingredients = list(
+                Ingredient.objects.values_list('id', flat=True)
+            )
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=random.choice(users),
+                name=f'explain {i}',
+                image='recipes/explain.png',
+                text='explain',
+                cooking_time=random.randint(1, 120),
+            )
+            for i in range(count)
+        )
+        recipes = list(Recipe.objects.filter(
+            name__startswith='explain '
+        ).values_list('id', flat=True))
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(
+                recipe_id=recipe,
+                ingredient_id=ingredient,
+                amount=random.randint(1, 500),
+            )
+            for recipe in recipes
+            for ingredient in random.sample(
+                ingredients, SEED_INGREDIENTS_PER_RECIPE
+            )
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe, tag_id=tag)
+            for recipe in recipes
+            for tag in random.sample(tags, random.randint(1, len(tags)))
+        )
+        for model in (Favorites, ShoppingCart):
+            model.objects.bulk_create(
+                model(user=user, recipe_id=recipe)
+                for user in users
+                for recipe in random.sample(
+                    recipes, min(SEED_RELATIONS, len(recipes))
+                )
+            )
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount
+            )
+            for (user_id, ingredient_id), amount in expected_totals(
+                user.id for user in users
+            ).items()
+        )
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for user in users
+            for author in random.sample(
+                users, min(SEED_RELATIONS, len(users))
+            )
+            if author != user
+        )
+        recount(counter_drift())
+        return users[0]
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from api.images import generate_variants, variants_ready
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Создает уменьшенные копии изображений для рецептов, '
+            'у которых их еще нет')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии для всех рецептов',
+        )
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for recipe_id, image, variants in Recipe.objects.exclude(
+            image=''
+        ).values_list('id', 'image', 'image_variants').iterator():
+            if not options['force'] and variants_ready(image, variants):
+                continue
+            try:
+                generate_variants(recipe_id, image)
+                done += 1
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe_id}: {error}')
+        self.stdout.write(f'Обработано: {done}, с ошибками: {failed}')
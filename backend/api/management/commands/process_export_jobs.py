@@ -0,0 +1,27 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+
+from api.export_jobs import cleanup_expired, process_pending
+
+
+class Command(BaseCommand):
+    help = ('Обрабатывает выгрузки списка покупок, оставшиеся в очереди '
+            'после перезапуска или сбоя обработчиков')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Опрашивать очередь с этим интервалом в секундах',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            cleanup_expired()
+            processed = process_pending()
+            self.stdout.write(f'Обработано выгрузок: {processed}')
+            if not options['interval']:
+                return
+            sleep(options['interval'])
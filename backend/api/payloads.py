@@ -0,0 +1,76 @@
+import gzip
+import threading
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from recipes.models import Ingredient, Tag
+from . import versions
+from .serializers import IngredientSerializer, TagSerializer
+
+
+def encoding_qualities(header):
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def accepts_gzip(request):
+    qualities = encoding_qualities(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+class StaticPayload:
+
+    def __init__(self, version_name, build):
+        self.version_name = version_name
+        self.build = build
+        self.version = None
+        self.raw = self.gzipped = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        version = versions.get_version(self.version_name)
+        if self.version != version:
+            with self.lock:
+                if self.version != version:
+                    raw = JSONRenderer().render(self.build())
+                    self.raw, self.gzipped = raw, gzip.compress(raw)
+                    self.version = version
+        return self.raw, self.gzipped
+
+    def response(self, request):
+        raw, gzipped = self.get()
+        if accepts_gzip(request):
+            response = HttpResponse(gzipped, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(raw, content_type='application/json')
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+tags_payload = StaticPayload(
+    versions.TAGS,
+    lambda: TagSerializer(Tag.objects.all(), many=True).data,
+)
+ingredients_payload = StaticPayload(
+    versions.INGREDIENTS,
+    lambda: IngredientSerializer(Ingredient.objects.all(), many=True).data,
+)
@@ -0,0 +1,62 @@
+from django.db import connection
+
+from recipes.aggregates import cart_changed
+from recipes.counters import count_favorites, count_followers
+from recipes.models import Favorites, ShoppingCart
+from recipes.timeline import follows_changed
+from . import versions
+
+
+def insert_relations(model, user_id, target_field, target_ids):
+    target_ids = list(target_ids)
+    if not target_ids:
+        return set()
+    table = model._meta.db_table
+    user_column = model._meta.get_field('user').column
+    target = model._meta.get_field(target_field)
+    target_table = target.related_model._meta.db_table
+    target_pk = target.related_model._meta.pk.column
+    placeholders = ', '.join(['%s'] * len(target_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({user_column}, {target.column}) '
+            f'SELECT %s, {target_pk} FROM {target_table} '
+            f'WHERE {target_pk} IN ({placeholders}) '
+            f'ON CONFLICT ({user_column}, {target.column}) DO NOTHING '
+            f'RETURNING {target.column}',
+            [user_id, *target_ids],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def delete_rows(queryset):
+    # One DELETE statement that bypasses Django's deletion collector, so no
+    # pre_delete/post_delete signals are sent and nothing cascades. The
+    # callers apply the side effects of those receivers (counters, shopping
+    # list, timeline, search index, render cache) once for the whole batch
+    # instead of once per row. Only use it for models nothing references.
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_relations(model, user_id, target_field, target_ids):
+    return delete_rows(model.objects.filter(
+        user_id=user_id, **{f'{target_field}_id__in': list(target_ids)}
+    ))
+
+
+def recipe_relations_changed(model, user_id, recipe_ids, added):
+    if not recipe_ids:
+        return
+    if model is ShoppingCart:
+        cart_changed(user_id, recipe_ids, added=added)
+    if model is Favorites:
+        count_favorites(recipe_ids, added=added)
+    versions.touch(versions.viewer(user_id))
+
+
+def follow_changed(user_id, author_ids, added):
+    if not author_ids:
+        return
+    follows_changed(user_id, author_ids, added=added)
+    count_followers(author_ids, added=added)
+    versions.touch(versions.viewer(user_id))
@@ -0,0 +1,133 @@
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from recipes.models import IngredientAmount, Recipe, Tag
+from users.models import User
+from .cache import recipe_cache
+from .images import absolute_variant_urls, variant_urls
+from .serializers import RecipeListSerializer
+from .viewer import get_viewer
+
+logger = logging.getLogger(__name__)
+
+RECIPE_PAGE_FIELDS = ('id', 'pub_date')
+RECIPE_PREFETCH = (
+    Prefetch(
+        'amounts',
+        queryset=IngredientAmount.objects.select_related(
+            'ingredient'
+        ).order_by('id')
+    ),
+    Prefetch('tags', queryset=Tag.objects.order_by('id')),
+)
+
+
+def render_instances(recipe_ids):
+    recipes = Recipe.objects.filter(id__in=recipe_ids).select_related(
+        'author'
+    ).prefetch_related(*RECIPE_PREFETCH)
+    return {
+        data['id']: dict(data)
+        for data in RecipeListSerializer(recipes, many=True).data
+    }
+
+
+def render_rows(recipe_ids):
+    recipes = list(Recipe.objects.filter(id__in=recipe_ids).values_list(
+        'id', 'author_id', 'name', 'image', 'image_variants', 'text',
+        'cooking_time'
+    ))
+    authors = {
+        author[1]: {
+            'email': author[0],
+            'id': author[1],
+            'username': author[2],
+            'first_name': author[3],
+            'last_name': author[4],
+            'is_subscribed': False,
+        }
+        for author in User.objects.filter(
+            id__in={recipe[1] for recipe in recipes}
+        ).values_list('email', 'id', 'username', 'first_name', 'last_name')
+    }
+    ingredients = defaultdict(list)
+    for recipe_id, *ingredient in IngredientAmount.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('id').values_list(
+        'recipe_id',
+        'ingredient_id',
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'amount',
+    ):
+        ingredients[recipe_id].append(dict(zip(
+            ('id', 'name', 'measurement_unit', 'amount'), ingredient
+        )))
+    tags = defaultdict(list)
+    for recipe_id, *tag in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('tag_id').values_list(
+        'recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'
+    ):
+        tags[recipe_id].append(dict(zip(
+            ('id', 'name', 'color', 'slug'), tag
+        )))
+    storage = Recipe._meta.get_field('image').storage
+    return {
+        pk: {
+            'id': pk,
+            'tags': tags[pk],
+            'author': authors[author_id],
+            'ingredients': ingredients[pk],
+            'is_favorited': False,
+            'is_in_shopping_cart': False,
+            'name': name,
+            'image': storage.url(image) if image else None,
+            'image_variants': variant_urls(image, variants, storage),
+            'text': text,
+            'cooking_time': cooking_time,
+        }
+        for pk, author_id, name, image, variants, text, cooking_time
+        in recipes
+    }
+
+
+def render_base(recipe_ids):
+    if settings.RECIPE_FAST_RENDER:
+        return render_rows(recipe_ids)
+    return render_instances(recipe_ids)
+
+
+def personalize(data, request, viewer):
+    author = data['author']
+    data = dict(
+        data,
+        author=dict(author, is_subscribed=viewer.is_subscribed(author['id'])),
+        is_favorited=viewer.is_favorited(data['id']),
+        is_in_shopping_cart=viewer.is_in_shopping_cart(data['id']),
+    )
+    if request is not None and data['image']:
+        data['image'] = request.build_absolute_uri(data['image'])
+        data['image_variants'] = absolute_variant_urls(
+            data['image_variants'], request
+        )
+    return data
+
+
+def render_recipes(recipe_ids, context):
+    rendered, keys = recipe_cache.get_many(recipe_ids)
+    missing = [pk for pk in recipe_ids if pk not in rendered]
+    if missing:
+        fresh = render_base(missing)
+        recipe_cache.set_many(fresh, keys)
+        rendered.update(fresh)
+    logger.debug('Recipe render cache: %s', recipe_cache.stats())
+    request = context.get('request')
+    viewer = get_viewer(context)
+    return [
+        personalize(rendered[pk], request, viewer)
+        for pk in recipe_ids if pk in rendered
+    ]
@@ -1,13 +1,18 @@
-from drf_extra_fields.fields import Base64ImageField
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
-from recipes.models import (Favorites,
-                            Ingredient,
-                            IngredientAmount,
-                            Recipe,
-                            ShoppingCart,
-                            Tag)
+from recipes.aggregates import recipe_ingredients_changed
+from recipes.models import Ingredient, IngredientAmount, Recipe, Tag
+from recipes.search import index_recipes
 from users.serializers import CustomUserSerializer
+from .cache import recipes_changed
+from .images import (LimitedBase64ImageField,
+                     absolute_variant_urls,
+                     variant_urls)
+from .relations import delete_rows
+from .viewer import get_viewer
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -42,34 +47,57 @@ class RecipeListSerializer(serializers.ModelSerializer):
     ingredients = serializers.SerializerMethodField(read_only=True)
     is_favorited = serializers.SerializerMethodField(read_only=True)
     is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
+    image_variants = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
-                  'is_in_shopping_cart', 'name', 'image', 'text',
-                  'cooking_time')
+                  'is_in_shopping_cart', 'name', 'image', 'image_variants',
+                  'text', 'cooking_time')
 
     def get_ingredients(self, obj):
-        queryset = IngredientAmount.objects.filter(recipe=obj)
-        return IngredientAmountSerializer(queryset, many=True).data
+        return IngredientAmountSerializer(obj.amounts.all(), many=True).data
 
     def get_is_favorited(self, obj) -> bool:
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return Favorites.objects.filter(user=request.user, recipe=obj).exists()
+        return get_viewer(self.context).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj) -> bool:
+        return get_viewer(self.context).is_in_shopping_cart(obj.id)
+
+    def get_image_variants(self, obj):
+        urls = variant_urls(
+            obj.image.name, obj.image_variants, obj.image.storage
+        )
         request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(
-                user=request.user, recipe=obj
-        ).exists()
+        if request is None or urls is None:
+            return urls
+        return absolute_variant_urls(urls, request)
+
+
+def resolve_ids(queryset, ids):
+    objects = queryset.in_bulk(ids)
+    missing = [pk for pk in dict.fromkeys(ids) if pk not in objects]
+    if missing:
+        raise serializers.ValidationError(
+            'Объекты не найдены: {}'.format(', '.join(map(str, missing)))
+        )
+    return [objects[pk] for pk in ids]
+
+
+class PrimaryKeyListField(serializers.ListField):
+    child = serializers.IntegerField(min_value=1)
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        ids = super().to_internal_value(data)
+        return resolve_ids(self.queryset, ids)
 
 
 class AddIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = IngredientAmount
@@ -77,18 +105,25 @@ class AddIngredientSerializer(serializers.ModelSerializer):
 
 
 class RecipeSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
+    tags = PrimaryKeyListField(queryset=Tag.objects.all())
     ingredients = AddIngredientSerializer(many=True)
     author = CustomUserSerializer(read_only=True)
-    image = Base64ImageField()
+    image = LimitedBase64ImageField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'name', 'image', 'text', 'cooking_time')
 
+    def validate_ingredients(self, value):
+        ingredients = resolve_ids(
+            Ingredient.objects.all(), [item['id'] for item in value]
+        )
+        return [
+            dict(item, id=ingredient)
+            for item, ingredient in zip(value, ingredients)
+        ]
+
     def validate(self, data):
         ingredients = data['ingredients']
         ingredients_set = set()
@@ -104,7 +139,6 @@ class RecipeSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     {'amount': 'Количества продукта должно быть больше нуля'}
                 )
-        print(ingredients_set)
 
         tags = data['tags']
         if not tags:
@@ -137,6 +171,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     def create_tags(tags, recipe):
         recipe.tags.set(tags)
 
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context.get('request').user
         tags = validated_data.pop('tags')
@@ -144,59 +179,78 @@ class RecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         self.create_ingredients(ingredients, recipe)
         self.create_tags(tags, recipe)
+        index_recipes([recipe.id])
+        recipes_changed([recipe.id])
         return recipe
 
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
+        prefetch_related_objects(
+            [instance],
+            Prefetch(
+                'amounts',
+                queryset=IngredientAmount.objects.select_related('ingredient')
+            ),
+        )
         return RecipeListSerializer(instance, context=context).data
 
+    @staticmethod
+    def update_ingredients(ingredients, recipe):
+        current = {
+            amount.ingredient_id: amount for amount in recipe.amounts.all()
+        }
+        old_amounts = {pk: amount.amount for pk, amount in current.items()}
+        new_amounts = {item['id'].id: item['amount'] for item in ingredients}
+        changed = []
+        for pk, amount in current.items():
+            if pk in new_amounts and amount.amount != new_amounts[pk]:
+                amount.amount = new_amounts[pk]
+                changed.append(amount)
+        removed = current.keys() - new_amounts.keys()
+        if removed:
+            delete_rows(recipe.amounts.filter(ingredient_id__in=removed))
+        if changed:
+            IngredientAmount.objects.bulk_update(changed, ('amount',))
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(recipe=recipe, ingredient_id=pk, amount=amount)
+            for pk, amount in new_amounts.items() if pk not in current
+        )
+        return old_amounts, new_amounts
+
+    @staticmethod
+    def update_tags(tags, recipe):
+        current = set(recipe.tags.values_list('id', flat=True))
+        new = {tag.id for tag in tags}
+        if current - new:
+            recipe.tags.remove(*(current - new))
+        if new - current:
+            recipe.tags.add(*(new - current))
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        IngredientAmount.objects.filter(recipe=instance).delete()
-        self.create_ingredients(validated_data.pop('ingredients'), instance)
-        self.create_tags(validated_data.pop('tags'), instance)
+        old_amounts, new_amounts = self.update_ingredients(
+            validated_data.pop('ingredients'), instance
+        )
+        self.update_tags(validated_data.pop('tags'), instance)
+        recipe_ingredients_changed(instance.id, old_amounts, new_amounts)
+        recipes_changed([instance.id])
         return super().update(instance, validated_data)
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
-
-
-class FavoriteSerializer(serializers.ModelSerializer):
+class BulkRecipesSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_ACTION_LIMIT,
+    )
 
-    class Meta:
-        model = Favorites
-        fields = ('user', 'recipe')
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
 
-    def validate(self, data):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        if Favorites.objects.filter(
-            user=request.user, recipe=data['recipe']
-        ).exists():
-            raise serializers.ValidationError(
-                {'status': 'Рецепт уже находится в избранном'}
-            )
-        return data
 
-    def to_representation(self, instance):
-        request = self.context.get('request')
-        context = {'request': request}
-        return ShortRecipeSerializer(instance.recipe, context=context).data
-
-
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShortRecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
-        model = ShoppingCart
-        fields = ('user', 'recipe')
-
-    def to_representation(self, instance):
-        request = self.context.get('request')
-        context = {'request': request}
-        return ShortRecipeSerializer(instance.recipe, context=context).data
+        model = Recipe
+        fields = ('id', 'name', 'image', 'cooking_time')
@@ -0,0 +1,180 @@
+import csv
+import json
+import os
+from functools import lru_cache
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.http import FileResponse, StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import DefaultContentNegotiation
+
+from recipes.models import ShoppingListItem
+from recipes.units import base_amount, base_unit, display_amount
+
+FONT_NAME = 'Handicraft'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'data', f'{FONT_NAME}.ttf')
+FONT_SIZE_HEADER = 24
+FONT_SIZE_ROW = 16
+HEADER_HORIZONTAL_POS = 200
+HEADER_VERTICAL_POS = 800
+ROW_HORIZONTAL_POS = 75
+ROW_VERTICAL_POS_START = 750
+ROW_VERTICAL_POS_MIN = 50
+ROWS_SPACING = 25
+HEADER = 'Список покупок'
+FILENAME = 'shopping_list.{}'
+SPOOL_MAX_SIZE = 1024 * 1024
+EXPORT_CHUNK_SIZE = 2000
+DEFAULT_FORMAT = 'pdf'
+EXPORT_FIELDS = ('name', 'measurement_unit', 'amount')
+
+
+def shopping_list(user):
+    return ShoppingListItem.objects.filter(user=user).values(
+        name=F('ingredient__name'),
+        measurement_unit=base_unit('ingredient__measurement_unit'),
+    ).annotate(
+        amount=Sum(base_amount('amount', 'ingredient__measurement_unit'))
+    ).order_by('name')
+
+
+def display_rows(rows):
+    for row in rows:
+        amount, unit = display_amount(row['amount'], row['measurement_unit'])
+        yield dict(row, amount=amount, measurement_unit=unit)
+
+
+@lru_cache(maxsize=None)
+def register_font():
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH, 'UTF-8'))
+    return FONT_NAME
+
+
+def format_row(number, row):
+    return '{}. {} - {} {}'.format(
+        number,
+        row['name'],
+        row['amount'],
+        row['measurement_unit'],
+    )
+
+
+def render_pdf(rows, output):
+    font = register_font()
+    page = canvas.Canvas(output, pagesize=A4)
+    page.setFont(font, size=FONT_SIZE_HEADER)
+    page.drawString(HEADER_HORIZONTAL_POS, HEADER_VERTICAL_POS, HEADER)
+    page.setFont(font, size=FONT_SIZE_ROW)
+    height = ROW_VERTICAL_POS_START
+    for number, row in enumerate(rows, 1):
+        if height < ROW_VERTICAL_POS_MIN:
+            page.showPage()
+            page.setFont(font, size=FONT_SIZE_ROW)
+            height = HEADER_VERTICAL_POS
+        page.drawString(ROW_HORIZONTAL_POS, height, format_row(number, row))
+        height -= ROWS_SPACING
+    page.showPage()
+    page.save()
+    return page.getPageNumber() - 1
+
+
+def export_row(row):
+    return {field: row[field] for field in EXPORT_FIELDS}
+
+
+def iter_txt(rows):
+    yield HEADER + '\n\n'
+    for number, row in enumerate(rows, 1):
+        yield format_row(number, row) + '\n'
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(export_row(row).values())
+
+
+def iter_json(rows):
+    separator = '['
+    for row in rows:
+        yield separator + json.dumps(export_row(row), ensure_ascii=False)
+        separator = ','
+    yield '[]' if separator == '[' else ']'
+
+
+TEXT_EXPORTS = {
+    'txt': iter_txt,
+    'csv': iter_csv,
+    'json': iter_json,
+}
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'txt': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+}
+
+
+def validate_format(export_format):
+    export_format = export_format or DEFAULT_FORMAT
+    if export_format not in CONTENT_TYPES:
+        raise ValidationError({'format': 'Поддерживаемые форматы: {}'.format(
+            ', '.join(CONTENT_TYPES)
+        )})
+    return export_format
+
+
+def export_rows(rows):
+    return display_rows(rows.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+
+
+def write_export(rows, export_format, output):
+    if export_format == 'pdf':
+        render_pdf(export_rows(rows), output)
+        return
+    for chunk in TEXT_EXPORTS[export_format](export_rows(rows)):
+        output.write(chunk.encode('utf-8'))
+
+
+def file_response(output, export_format):
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=FILENAME.format(export_format),
+        content_type=CONTENT_TYPES[export_format],
+    )
+
+
+def export_response(rows, export_format):
+    if export_format == 'pdf':
+        output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        write_export(rows, export_format, output)
+        output.seek(0)
+        return file_response(output, export_format)
+    response = StreamingHttpResponse(
+        TEXT_EXPORTS[export_format](export_rows(rows)),
+        content_type=CONTENT_TYPES[export_format],
+    )
+    response['Content-Disposition'] = 'attachment; filename="{}"'.format(
+        FILENAME.format(export_format)
+    )
+    return response
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
@@ -0,0 +1,189 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed,
+                                      post_delete,
+                                      post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.aggregates import cart_changed
+from recipes.counters import count_favorites, count_followers, count_recipes
+from recipes.models import (Favorites,
+                            Ingredient,
+                            IngredientAmount,
+                            Recipe,
+                            ShoppingCart,
+                            Tag)
+from recipes.search import index_recipes, unindex_recipes
+from recipes.timeline import follows_changed, recipes_published
+from users.models import Follow, User
+from . import versions, workers
+from .authentication import forget
+from .cache import recipes_changed
+from .images import generate_variants, variants_ready
+
+NOT_RENDERED_USER_FIELDS = frozenset(('last_login', 'password'))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    recipes_changed([instance.id])
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    index_recipes([instance.id])
+
+
+@receiver(post_save, sender=Recipe)
+def queue_image_variants(sender, instance, **kwargs):
+    image = instance.image.name
+    if image and not variants_ready(image, instance.image_variants):
+        transaction.on_commit(lambda: workers.submit(
+            generate_variants, instance.id, image
+        ))
+
+
+@receiver(post_save, sender=Recipe)
+def publish_recipe(sender, instance, created, **kwargs):
+    if created:
+        recipes_published([instance.id])
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    unindex_recipes([instance.id])
+
+
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+def index_recipe_ingredients(sender, instance, **kwargs):
+    index_recipes([instance.recipe_id])
+
+
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+def invalidate_recipe_ingredients(sender, instance, **kwargs):
+    recipes_changed([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        recipes_changed([instance.id])
+    elif pk_set:
+        recipes_changed(pk_set)
+    else:
+        recipes_changed()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, created=False, **kwargs):
+    versions.touch(versions.TAGS)
+    if not created:
+        recipes_changed()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, created=False, **kwargs):
+    versions.touch(versions.INGREDIENTS)
+    if not created:
+        recipes_changed()
+
+
+@receiver(post_save, sender=Ingredient)
+def index_ingredient_recipes(sender, instance, created, **kwargs):
+    if not created:
+        index_recipes(instance.amounts.values_list('recipe_id', flat=True))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, created, update_fields,
+                              **kwargs):
+    if created or (
+        update_fields and NOT_RENDERED_USER_FIELDS.issuperset(update_fields)
+    ):
+        return
+    recipes_changed(instance.recipes.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Favorites)
+@receiver(post_delete, sender=Favorites)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def touch_viewer(sender, instance, **kwargs):
+    versions.touch(versions.viewer(instance.user_id))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        cart_changed(instance.user_id, [instance.recipe_id], added=True)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    cart_changed(instance.user_id, [instance.recipe_id], added=False)
+
+
+@receiver(post_save, sender=Follow)
+def add_to_timeline(sender, instance, created, **kwargs):
+    if created:
+        follows_changed(instance.user_id, [instance.author_id], added=True)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_from_timeline(sender, instance, **kwargs):
+    follows_changed(instance.user_id, [instance.author_id], added=False)
+
+
+@receiver(post_save, sender=Recipe)
+def count_author_recipe(sender, instance, created, **kwargs):
+    if created:
+        count_recipes([instance.author_id], added=True)
+
+
+@receiver(post_delete, sender=Recipe)
+def uncount_author_recipe(sender, instance, **kwargs):
+    count_recipes([instance.author_id], added=False)
+
+
+@receiver(post_save, sender=Favorites)
+def count_favorite(sender, instance, created, **kwargs):
+    if created:
+        count_favorites([instance.recipe_id], added=True)
+
+
+@receiver(post_delete, sender=Favorites)
+def uncount_favorite(sender, instance, **kwargs):
+    count_favorites([instance.recipe_id], added=False)
+
+
+@receiver(post_save, sender=Follow)
+def count_follower(sender, instance, created, **kwargs):
+    if created:
+        count_followers([instance.author_id], added=True)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follower(sender, instance, **kwargs):
+    count_followers([instance.author_id], added=False)
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    forget(key=instance.key, user_id=instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    forget(user_id=instance.id)
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from api import versions
+from api.authentication import (CachedTokenAuthentication,
+                                TokenCache,
+                                token_cache)
+from .utils import clear_caches, create_user
+
+
+class CachedTokenAuthenticationTest(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        token_cache.discard()
+        token_cache.entries.clear()
+        self.user = create_user('user')
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+
+    def authenticate(self):
+        return self.authentication.authenticate_credentials(self.token.key)
+
+    def client_with_token(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        return client
+
+    def test_cache_hit_does_not_query_database(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(token.key, self.token.key)
+        self.assertEqual(token.user, user)
+
+    def test_logout_invalidates_cache(self):
+        client = self.client_with_token()
+        self.assertEqual(client.get('/api/users/me/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(client.get('/api/users/me/').status_code, 401)
+
+    def test_deleted_token_is_rejected(self):
+        key = self.token.key
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(key)
+
+    def test_user_change_refreshes_snapshot(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Другое'
+            self.user.set_password('new-password-123')
+            self.user.save()
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate()
+        self.assertEqual(user.first_name, 'Другое')
+        self.assertTrue(user.check_password('new-password-123'))
+
+
+class TokenCacheTest(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user('user')
+
+    def snapshot(self):
+        return {
+            'user_id': self.user.id,
+            'version': versions.get_version(versions.auth(self.user.id)),
+        }
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TokenCache(max_size=2, ttl=60)
+        for key in ('a', 'b'):
+            cache.set(key, self.snapshot(), cache.generation)
+        cache.get('a')
+        cache.set('c', self.snapshot(), cache.generation)
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+        self.assertIsNone(cache.get('b'))
+
+    def test_entry_expires_after_ttl(self):
+        cache = TokenCache(max_size=2, ttl=60)
+        with mock.patch('api.authentication.time.monotonic', return_value=0):
+            cache.set('a', self.snapshot(), cache.generation)
+            self.assertIsNotNone(cache.get('a'))
+        with mock.patch(
+            'api.authentication.time.monotonic', return_value=61
+        ):
+            self.assertIsNone(cache.get('a'))
+
+    def test_set_after_discard_is_dropped(self):
+        cache = TokenCache(max_size=2, ttl=60)
+        generation = cache.generation
+        cache.discard(key='a')
+        cache.set('a', self.snapshot(), generation)
+        self.assertIsNone(cache.get('a'))
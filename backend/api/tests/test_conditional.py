@@ -0,0 +1,43 @@
+from django.test import TestCase
+
+from .utils import (clear_caches,
+                    client_for,
+                    create_ingredients,
+                    create_recipe,
+                    create_tags,
+                    create_user)
+
+RECIPES_URL = '/api/recipes/'
+
+
+class RecipeConditionalGetTest(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user('user')
+        tags = create_tags(1)
+        ingredients = create_ingredients(1)
+        self.recipes = [
+            create_recipe(self.user, tags, ingredients) for _ in range(3)
+        ]
+        self.client = client_for(self.user)
+
+    def etag(self):
+        response = self.client.get(RECIPES_URL)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_not_modified_costs_one_query(self):
+        etag = self.etag()
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('COUNT', queries.captured_queries[0]['sql'])
+
+    def test_delete_changes_etag(self):
+        etag = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipes[0].delete()
+        response = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,174 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from recipes.counters import counter_drift
+from recipes.models import Favorites, Recipe
+from users.models import Follow, User
+from .utils import (clear_caches,
+                    client_for,
+                    create_ingredients,
+                    create_recipe,
+                    create_tags,
+                    create_user)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_data():
+    output = BytesIO()
+    Image.new('RGB', (1, 1)).save(output, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        output.getvalue()
+    ).decode('ascii')
+
+
+class CounterFieldsMixinTest(TestCase):
+
+    def setUp(self):
+        self.user = create_user('user')
+
+    def test_save_keeps_concurrent_counter_changes(self):
+        User.objects.filter(id=self.user.id).update(
+            followers_count=F('followers_count') + 1
+        )
+        self.user.first_name = 'Другое'
+        self.user.save()
+        user = User.objects.get(id=self.user.id)
+        self.assertEqual(user.first_name, 'Другое')
+        self.assertEqual(user.followers_count, 1)
+
+    def test_deferred_save_updates_loaded_fields_only(self):
+        user = User.objects.only('id', 'first_name').get(id=self.user.id)
+        user.first_name = 'Другое'
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"first_name"', updates[0])
+        self.assertNotIn('"followers_count"', updates[0])
+        self.assertNotIn('"username"', updates[0])
+        self.assertEqual(
+            User.objects.get(id=self.user.id).first_name, 'Другое'
+        )
+
+    def test_save_of_deleted_row_inserts_it_again(self):
+        User.objects.filter(id=self.user.id).delete()
+        self.user.save()
+        self.assertTrue(User.objects.filter(id=self.user.id).exists())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CountersTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        clear_caches()
+        self.users = [create_user(f'user{i}') for i in range(3)]
+        self.author = create_user('author')
+        self.tags = create_tags(1)
+        self.ingredients = create_ingredients(2)
+        self.recipes = [
+            create_recipe(self.author, self.tags, self.ingredients)
+            for _ in range(3)
+        ]
+
+    def assert_counters(self):
+        self.assertEqual(counter_drift(), [])
+
+    def counters(self, user):
+        user = User.objects.get(id=user.id)
+        return user.recipes_count, user.followers_count
+
+    def favorites_count(self, recipe):
+        return Recipe.objects.get(id=recipe.id).favorites_count
+
+    def test_favorite_add_and_remove(self):
+        url = f'/api/recipes/{self.recipes[0].id}/favorite/'
+        for user in self.users:
+            client_for(user).post(url)
+        client_for(self.users[0]).post(url)
+        self.assertEqual(self.favorites_count(self.recipes[0]), 3)
+        client_for(self.users[0]).delete(url)
+        client_for(self.users[0]).delete(url)
+        self.assertEqual(self.favorites_count(self.recipes[0]), 2)
+        self.assert_counters()
+
+    def test_favorite_bulk(self):
+        client = client_for(self.users[0])
+        ids = [recipe.id for recipe in self.recipes]
+        for recipes in (ids + ids[:1] + [10 ** 6], ids):
+            response = client.post(
+                '/api/recipes/favorite/bulk/', {'recipes': recipes},
+                format='json',
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [self.favorites_count(recipe) for recipe in self.recipes],
+            [1, 1, 1],
+        )
+        response = client.delete('/api/recipes/favorite/bulk/', {
+            'recipes': ids[:2] + ids[:1]
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [self.favorites_count(recipe) for recipe in self.recipes],
+            [0, 0, 1],
+        )
+        self.assert_counters()
+
+    def test_follow_and_unfollow(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        for user in self.users:
+            client_for(user).post(url)
+        client_for(self.users[0]).post(url)
+        self.assertEqual(self.counters(self.author), (3, 3))
+        client_for(self.users[0]).delete(url)
+        client_for(self.users[0]).delete(url)
+        self.assertEqual(self.counters(self.author), (3, 2))
+        self.assert_counters()
+
+    def test_recipe_create_and_delete(self):
+        client = client_for(self.author)
+        response = client.post('/api/recipes/', {
+            'name': 'Новый',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'image': image_data(),
+            'tags': [self.tags[0].id],
+            'ingredients': [{'id': self.ingredients[0].id, 'amount': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.counters(self.author), (4, 0))
+        response = client.delete(f'/api/recipes/{response.data["id"]}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.counters(self.author), (3, 0))
+        self.assert_counters()
+
+    def test_cascade_deletes(self):
+        for user in self.users:
+            Favorites.objects.create(user=user, recipe=self.recipes[0])
+            Follow.objects.create(user=user, author=self.author)
+        Follow.objects.create(user=self.author, author=self.users[1])
+        self.users[0].delete()
+        self.assertEqual(self.favorites_count(self.recipes[0]), 2)
+        self.assertEqual(self.counters(self.author), (3, 2))
+        self.recipes[0].delete()
+        self.assertEqual(self.counters(self.author), (2, 2))
+        self.author.delete()
+        self.assertEqual(self.counters(self.users[1]), (0, 0))
+        self.assert_counters()
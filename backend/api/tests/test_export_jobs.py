@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.export_jobs import (claim_job,
+                             cleanup_expired,
+                             process_pending,
+                             run_export)
+from recipes.models import ExportJob
+from .utils import clear_caches, client_for, create_user
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ExportJobTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user('user')
+
+    def create_job(self, **fields):
+        return ExportJob.objects.create(
+            user=self.user, format='txt', fingerprint='0' * 40, **fields
+        )
+
+    def media_files(self):
+        return {
+            os.path.join(root, name)
+            for root, _, names in os.walk(MEDIA_ROOT) for name in names
+        }
+
+    def stale(self):
+        return timezone.now() - timedelta(
+            seconds=settings.EXPORT_JOB_TIMEOUT + 1
+        )
+
+    def test_pending_job_without_dispatch_is_processed(self):
+        job = self.create_job()
+        self.assertEqual(process_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.DONE)
+        self.assertTrue(job.file.storage.exists(job.file.name))
+
+    def test_cleanup_keeps_old_running_job(self):
+        job = self.create_job(
+            status=ExportJob.RUNNING, claim='a' * 32, claimed=timezone.now()
+        )
+        ExportJob.objects.filter(id=job.id).update(created=self.stale())
+        cleanup_expired()
+        self.assertTrue(ExportJob.objects.filter(id=job.id).exists())
+        self.assertIsNone(claim_job())
+
+    def test_cleanup_removes_expired_results(self):
+        job = self.create_job(
+            status=ExportJob.DONE,
+            finished=timezone.now() - timedelta(
+                seconds=settings.EXPORT_RESULT_TTL + 1
+            ),
+        )
+        cleanup_expired()
+        self.assertFalse(ExportJob.objects.filter(id=job.id).exists())
+
+    def test_stale_claim_is_reclaimed_and_late_result_dropped(self):
+        self.create_job()
+        first = claim_job()
+        ExportJob.objects.filter(id=first.id).update(claimed=self.stale())
+        second = claim_job()
+        self.assertEqual(second.id, first.id)
+        self.assertEqual(second.attempts, 2)
+        files = self.media_files()
+        run_export(first)
+        self.assertFalse(first.file)
+        self.assertEqual(self.media_files(), files)
+        job = ExportJob.objects.get(id=first.id)
+        self.assertEqual(job.status, ExportJob.RUNNING)
+        self.assertEqual(job.claim, second.claim)
+        run_export(second)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.DONE)
+        self.assertEqual(job.file.name, second.file.name)
+
+    def test_abandoned_job_fails_after_max_attempts(self):
+        job = self.create_job(
+            status=ExportJob.RUNNING,
+            claim='a' * 32,
+            claimed=self.stale(),
+            attempts=settings.EXPORT_MAX_ATTEMPTS,
+        )
+        self.assertIsNone(claim_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.FAILED)
+        self.assertIsNotNone(job.finished)
+
+    def test_job_response_status_follows_job_status(self):
+        client = client_for(self.user)
+        url = '/api/recipes/download_shopping_cart/?format=txt&async=1'
+        response = client.get(url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], ExportJob.PENDING)
+        self.assertEqual(response['Location'], response.data['url'])
+        process_pending()
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], ExportJob.DONE)
+        self.assertFalse(response.has_header('Location'))
+        download = client.get(response.data['url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(download.has_header('Content-Disposition'))
+        download.close()
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.models import Recipe, TimelineEntry
+from recipes.timeline import build_timeline
+from users.models import Follow
+from .utils import (clear_caches,
+                    client_for,
+                    create_ingredients,
+                    create_recipe,
+                    create_tags,
+                    create_user)
+
+FEED_URL = '/api/recipes/feed/'
+
+
+class FeedTest(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user('user')
+        self.authors = [create_user(f'author{i}') for i in range(3)]
+        self.tags = create_tags(1)
+        self.ingredients = create_ingredients(1)
+        now = timezone.now()
+        # Pairs of recipes share a pub_date so pages break inside ties.
+        for index in range(9):
+            recipe = self.create_recipe(self.authors[index % 3])
+            Recipe.objects.filter(id=recipe.id).update(
+                pub_date=now - timedelta(minutes=index // 2)
+            )
+        self.followed = self.authors[:2]
+        for author in self.followed:
+            Follow.objects.create(user=self.user, author=author)
+        self.client = client_for(self.user)
+
+    def create_recipe(self, author):
+        return create_recipe(author, self.tags, self.ingredients)
+
+    def expected(self):
+        return list(Recipe.objects.filter(
+            author__in=self.followed
+        ).order_by('-pub_date', '-id').values_list('id', flat=True))
+
+    def feed_ids(self, limit):
+        ids = []
+        url = f'{FEED_URL}?limit={limit}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(recipe['id'] for recipe in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def assert_feed(self):
+        for limit in (1, 2, 3, 100):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.feed_ids(limit), self.expected())
+
+    def test_feed_without_timeline(self):
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assert_feed()
+
+    def test_feed_from_timeline(self):
+        build_timeline(self.user.id)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(),
+            len(self.expected()),
+        )
+        self.assert_feed()
+
+    def test_new_recipe_is_fanned_out(self):
+        build_timeline(self.user.id)
+        recipe = self.create_recipe(self.authors[0])
+        other = self.create_recipe(self.authors[2])
+        entries = TimelineEntry.objects.filter(user=self.user)
+        self.assertTrue(entries.filter(recipe=recipe).exists())
+        self.assertFalse(entries.filter(recipe=other).exists())
+        self.assertEqual(self.feed_ids(100)[0], recipe.id)
+        self.assert_feed()
+
+    def test_unfollow_removes_author_entries(self):
+        build_timeline(self.user.id)
+        response = self.client.delete(
+            f'/api/users/{self.authors[0].id}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.user, recipe__author=self.authors[0]
+        ).exists())
+        self.followed = self.authors[1:2]
+        self.assert_feed()
+
+    def test_follow_adds_author_entries(self):
+        build_timeline(self.user.id)
+        response = self.client.post(
+            f'/api/users/{self.authors[2].id}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.user, recipe__author=self.authors[2]
+            ).values_list('recipe_id', flat=True)),
+            set(self.authors[2].recipes.values_list('id', flat=True)),
+        )
+        self.followed = self.authors
+        self.assert_feed()
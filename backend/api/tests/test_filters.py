@@ -0,0 +1,104 @@
+from itertools import product
+
+from django.contrib.auth.models import AnonymousUser
+from django.db.models.sql.datastructures import Join
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from api.filters import RecipeFilter
+from recipes.models import Favorites, Recipe, ShoppingCart
+from .utils import (create_ingredients,
+                    create_recipe,
+                    create_tags,
+                    create_user)
+
+FLAGS = (None, 'true', 'false')
+
+
+class RecipeFilterMatrixTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [create_user(f'author{i}') for i in range(2)]
+        cls.user = create_user('reader')
+        cls.tags = create_tags(3)
+        ingredients = create_ingredients(2)
+        cls.recipe_tags = {}
+        recipes = []
+        for i in range(12):
+            tags = [tag for bit, tag in enumerate(cls.tags) if i >> bit & 1]
+            recipe = create_recipe(
+                cls.authors[i % 2], tags, ingredients, name=f'Рецепт {i}'
+            )
+            cls.recipe_tags[recipe.id] = {tag.slug for tag in tags}
+            recipes.append(recipe)
+        cls.favorites = {recipe.id for recipe in recipes[::2]}
+        cls.cart = {recipe.id for recipe in recipes[::3]}
+        for recipe_id in cls.favorites:
+            Favorites.objects.create(user=cls.user, recipe_id=recipe_id)
+        for recipe_id in cls.cart:
+            ShoppingCart.objects.create(user=cls.user, recipe_id=recipe_id)
+        other = create_user('other')
+        for recipe in recipes:
+            Favorites.objects.create(user=other, recipe=recipe)
+            ShoppingCart.objects.create(user=other, recipe=recipe)
+        cls.recipe_authors = dict(
+            Recipe.objects.values_list('id', 'author_id')
+        )
+
+    def filter(self, user, data):
+        request = APIRequestFactory().get('/api/recipes/', data)
+        request.user = user
+        return RecipeFilter(
+            request.GET, queryset=Recipe.objects.all(), request=request
+        ).qs
+
+    @staticmethod
+    def joins(query):
+        return [
+            alias for alias, table in query.alias_map.items()
+            if isinstance(table, Join) and query.alias_refcount[alias]
+        ]
+
+    def expected(self, user, favorited, in_cart, author, tags):
+        ids = set(self.recipe_authors)
+        for flag, members in ((favorited, self.favorites),
+                              (in_cart, self.cart)):
+            if flag == 'true':
+                ids &= members if user.is_authenticated else set()
+        if author is not None:
+            ids = {
+                pk for pk in ids if self.recipe_authors[pk] == author.id
+            }
+        if tags:
+            ids = {pk for pk in ids if self.recipe_tags[pk] & set(tags)}
+        return ids
+
+    def test_every_filter_combination(self):
+        tag_choices = (
+            [], [self.tags[0].slug], [self.tags[0].slug, self.tags[1].slug]
+        )
+        for user, favorited, in_cart, author, tags in product(
+            (self.user, AnonymousUser()),
+            FLAGS,
+            FLAGS,
+            (None, *self.authors),
+            tag_choices,
+        ):
+            data = {'tags': tags}
+            for name, value in (('is_favorited', favorited),
+                                ('is_in_shopping_cart', in_cart),
+                                ('author', author and author.id)):
+                if value is not None:
+                    data[name] = value
+            with self.subTest(user=str(user), **data):
+                queryset = self.filter(user, data)
+                ids = list(queryset.values_list('id', flat=True))
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(queryset.count(), len(ids))
+                self.assertEqual(
+                    set(ids),
+                    self.expected(user, favorited, in_cart, author, tags),
+                )
+                self.assertFalse(queryset.query.distinct)
+                self.assertEqual(self.joins(queryset.query), [])
@@ -0,0 +1,30 @@
+from django.test import RequestFactory, SimpleTestCase
+
+from api.payloads import accepts_gzip
+
+
+class AcceptsGzipTest(SimpleTestCase):
+
+    def test_accept_encoding_headers(self):
+        cases = (
+            ('', False),
+            ('gzip', True),
+            ('gzip, deflate, br', True),
+            ('GZIP', True),
+            ('br;q=1.0, gzip;q=0.5', True),
+            ('gzip;q=0', False),
+            ('gzip; q=0.0, deflate', False),
+            ('deflate', False),
+            ('*', True),
+            ('*;q=0', False),
+            ('gzip;q=0, *', False),
+            ('identity, *;q=0.1', True),
+            ('x-gzip', False),
+            ('gzip;q=abc', False),
+        )
+        for header, expected in cases:
+            with self.subTest(header=header):
+                request = RequestFactory().get(
+                    '/', HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertIs(accepts_gzip(request), expected)
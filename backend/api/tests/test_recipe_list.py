@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.permissions import AllowAny
+
+from api.views import RecipeViewSet
+from recipes.models import Favorites, ShoppingCart
+from users.models import Follow
+from .utils import (clear_caches,
+                    client_for,
+                    create_ingredients,
+                    create_recipe,
+                    create_tags,
+                    create_user)
+
+LIMITS = (1, 10, 100)
+
+
+class RecipeListQueryCountTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = [create_user(f'author{i}') for i in range(5)]
+        tags = create_tags(3)
+        ingredients = create_ingredients(6)
+        cls.recipes = [
+            create_recipe(
+                authors[i % len(authors)],
+                tags[:1 + i % len(tags)],
+                ingredients[:1 + i % len(ingredients)],
+                name=f'Рецепт {i}',
+            )
+            for i in range(100)
+        ]
+        cls.reader = create_user('reader')
+        for recipe in cls.recipes[::3]:
+            Favorites.objects.create(user=cls.reader, recipe=recipe)
+        for recipe in cls.recipes[::4]:
+            ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+        for author in authors[:2]:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def list_queries(self, client, limit):
+        clear_caches()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'/api/recipes/?limit={limit}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), limit)
+        return len(context)
+
+    def assert_constant_queries(self, client):
+        for fast_render in (False, True):
+            with self.subTest(fast_render=fast_render), override_settings(
+                RECIPE_FAST_RENDER=fast_render
+            ):
+                expected = self.list_queries(client, LIMITS[0])
+                for limit in LIMITS[1:]:
+                    clear_caches()
+                    with self.assertNumQueries(expected):
+                        response = client.get(f'/api/recipes/?limit={limit}')
+                    self.assertEqual(
+                        len(response.json()['results']), limit
+                    )
+
+    def test_authenticated_list_queries_do_not_depend_on_page_size(self):
+        self.assert_constant_queries(client_for(self.reader))
+
+    # The list endpoint requires authentication, so the anonymous viewer
+    # path is exercised with the permission check lifted.
+    @mock.patch.object(RecipeViewSet, 'permission_classes', [AllowAny])
+    def test_anonymous_list_queries_do_not_depend_on_page_size(self):
+        self.assert_constant_queries(client_for())
@@ -0,0 +1,70 @@
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import IngredientAmount
+from .utils import (clear_caches,
+                    client_for,
+                    create_ingredients,
+                    create_recipe,
+                    create_tags,
+                    create_user)
+
+AMOUNTS_WRITE = re.compile(
+    r'\s*(INSERT|UPDATE|DELETE)\s+(?:INTO\s+|FROM\s+)?"?{}"?\s'.format(
+        IngredientAmount._meta.db_table
+    ),
+    re.IGNORECASE,
+)
+
+
+class RecipeIngredientsUpdateTest(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.author = create_user('author')
+        self.tags = create_tags(2)
+        self.ingredients = create_ingredients(5)
+        self.recipe = create_recipe(self.author, self.tags, self.ingredients)
+        self.client = client_for(self.author)
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def patch(self, amounts):
+        response = self.client.patch(self.url, {
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amount}
+                for ingredient, amount in zip(self.ingredients, amounts)
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def amounts_statements(self, queries):
+        return [
+            match.group(1).upper()
+            for match in (
+                AMOUNTS_WRITE.match(query['sql']) for query in queries
+            )
+            if match
+        ]
+
+    def test_one_amount_change_is_a_single_update(self):
+        with CaptureQueriesContext(connection) as unchanged:
+            self.patch([1, 2, 3, 4, 5])
+        self.assertEqual(self.amounts_statements(unchanged), [])
+        # The UPDATE itself plus the lookup of carts holding the recipe.
+        with self.assertNumQueries(len(unchanged) + 2) as changed:
+            self.patch([1, 2, 7, 4, 5])
+        self.assertEqual(self.amounts_statements(changed), ['UPDATE'])
+        self.assertEqual(
+            list(self.recipe.amounts.order_by('ingredient_id').values_list(
+                'amount', flat=True
+            )),
+            [1, 2, 7, 4, 5],
+        )
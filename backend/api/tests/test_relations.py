@@ -0,0 +1,73 @@
+from django.test import TestCase
+
+from recipes.models import Favorites, ShoppingCart
+from users.models import Follow
+from .utils import (clear_caches,
+                    client_for,
+                    create_ingredients,
+                    create_recipe,
+                    create_tags,
+                    create_user)
+
+
+class RelationsTest(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user('user')
+        self.author = create_user('author')
+        self.recipe = create_recipe(
+            self.author, create_tags(1), create_ingredients(2)
+        )
+        self.client = client_for(self.user)
+
+    def relations(self):
+        # url, model, rows of the viewer,
+        # queries for POST, duplicate POST, DELETE, repeated DELETE.
+        return (
+            (
+                f'/api/recipes/{self.recipe.id}/favorite/',
+                Favorites.objects.filter(user=self.user, recipe=self.recipe),
+                (5, 4, 4, 3),
+            ),
+            (
+                f'/api/recipes/{self.recipe.id}/shopping_cart/',
+                ShoppingCart.objects.filter(
+                    user=self.user, recipe=self.recipe
+                ),
+                (8, 4, 6, 3),
+            ),
+            (
+                f'/api/users/{self.author.id}/subscribe/',
+                Follow.objects.filter(user=self.user, author=self.author),
+                (7, 4, 5, 4),
+            ),
+        )
+
+    def test_duplicate_post_is_rejected_and_keeps_one_row(self):
+        for url, rows, _ in self.relations():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url).status_code, 201)
+                self.assertEqual(self.client.post(url).status_code, 400)
+                self.assertEqual(rows.count(), 1)
+
+    def test_delete_removes_row(self):
+        for url, rows, _ in self.relations():
+            with self.subTest(url=url):
+                self.client.post(url)
+                self.assertEqual(self.client.delete(url).status_code, 204)
+                self.assertFalse(rows.exists())
+                self.assertIn(self.client.delete(url).status_code, (400, 404))
+
+    def test_query_counts(self):
+        for url, _, counts in self.relations():
+            post, duplicate, delete, repeated = counts
+            with self.subTest(url=url):
+                with self.assertNumQueries(post):
+                    self.client.post(url)
+                with self.assertNumQueries(duplicate):
+                    self.client.post(url)
+                with self.assertNumQueries(delete):
+                    self.client.delete(url)
+                with self.assertNumQueries(repeated):
+                    self.client.delete(url)
@@ -0,0 +1,42 @@
+from django.test import TestCase
+
+from api.cache import GENERATION_KEY, recipe_cache, recipes_changed
+from .utils import clear_caches
+
+
+class RecipeRenderCacheTest(TestCase):
+
+    def setUp(self):
+        clear_caches()
+
+    def test_hit_after_set(self):
+        found, keys = recipe_cache.get_many([1, 2])
+        self.assertEqual(found, {})
+        recipe_cache.set_many({1: {'id': 1}, 2: {'id': 2}}, keys)
+        found, _ = recipe_cache.get_many([1, 2])
+        self.assertEqual(found, {1: {'id': 1}, 2: {'id': 2}})
+
+    def test_late_write_after_invalidation_is_dropped(self):
+        _, keys = recipe_cache.get_many([1, 2])
+        with self.captureOnCommitCallbacks(execute=True):
+            recipes_changed([1])
+        recipe_cache.set_many({1: {'id': 1}, 2: {'id': 2}}, keys)
+        found, _ = recipe_cache.get_many([1, 2])
+        self.assertEqual(found, {2: {'id': 2}})
+
+    def test_late_write_after_full_invalidation_is_dropped(self):
+        _, keys = recipe_cache.get_many([1])
+        with self.captureOnCommitCallbacks(execute=True):
+            recipes_changed()
+        recipe_cache.set_many({1: {'id': 1}}, keys)
+        found, _ = recipe_cache.get_many([1])
+        self.assertEqual(found, {})
+
+    def test_evicted_generation_does_not_revive_old_entries(self):
+        _, keys = recipe_cache.get_many([1])
+        recipe_cache.set_many({1: {'name': 'old'}}, keys)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipes_changed()
+        recipe_cache.cache.delete(GENERATION_KEY)
+        found, _ = recipe_cache.get_many([1])
+        self.assertEqual(found, {})
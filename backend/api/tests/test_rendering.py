@@ -0,0 +1,92 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.images import IMAGE_FORMATS, IMAGE_VARIANTS
+from api.rendering import render_recipes
+from api.serializers import RecipeListSerializer
+from api.viewer import ViewerState
+from recipes.models import Favorites, Recipe, ShoppingCart
+from users.models import Follow
+from .utils import (clear_caches,
+                    create_ingredients,
+                    create_recipe,
+                    create_tags,
+                    create_user)
+
+
+class FastRendererEquivalenceTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        followed = create_user('followed')
+        cls.viewer = create_user('viewer')
+        tags = create_tags(3)
+        ingredients = create_ingredients(4)
+        source = 'recipes/ready.png'
+        recipes = [
+            create_recipe(author, tags[:1], ingredients[:1], name='Простой'),
+            create_recipe(author, tags, ingredients, name='Много тегов'),
+            create_recipe(followed, tags[1:], ingredients[2:],
+                          name='Автор в подписках'),
+            create_recipe(author, [], ingredients[:2], image='',
+                          name='Без картинки'),
+            create_recipe(author, [], [], name='Пустой'),
+            create_recipe(
+                followed, tags[:2], ingredients[1:3], image=source,
+                image_variants={
+                    'source': source,
+                    **{
+                        name: {
+                            key: f'recipes/variants/{name}.{extension}'
+                            for key, _, extension in IMAGE_FORMATS
+                        }
+                        for name, _ in IMAGE_VARIANTS
+                    },
+                },
+                name='С уменьшенными копиями',
+            ),
+        ]
+        Favorites.objects.create(user=cls.viewer, recipe=recipes[0])
+        Favorites.objects.create(user=cls.viewer, recipe=recipes[2])
+        ShoppingCart.objects.create(user=cls.viewer, recipe=recipes[1])
+        ShoppingCart.objects.create(user=cls.viewer, recipe=recipes[2])
+        Follow.objects.create(user=cls.viewer, author=followed)
+        cls.recipe_ids = [recipe.id for recipe in recipes]
+
+    def setUp(self):
+        clear_caches()
+
+    def context(self, user):
+        request = APIRequestFactory().get('/api/recipes/')
+        request.user = user
+        return {'request': request, 'viewer': ViewerState(user)}
+
+    def expected(self, user):
+        recipes = Recipe.objects.in_bulk(self.recipe_ids)
+        return JSONRenderer().render(RecipeListSerializer(
+            [recipes[pk] for pk in self.recipe_ids],
+            many=True,
+            context=self.context(user),
+        ).data)
+
+    def assert_identical(self, user):
+        expected = self.expected(user)
+        for fast_render in (False, True):
+            for cached in (False, True):
+                with self.subTest(fast_render=fast_render, cached=cached):
+                    if not cached:
+                        clear_caches()
+                    with override_settings(RECIPE_FAST_RENDER=fast_render):
+                        actual = JSONRenderer().render(render_recipes(
+                            self.recipe_ids, self.context(user)
+                        ))
+                    self.assertEqual(actual, expected)
+
+    def test_output_matches_serializer_for_viewer(self):
+        self.assert_identical(self.viewer)
+
+    def test_output_matches_serializer_for_anonymous(self):
+        self.assert_identical(AnonymousUser())
@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from users.models import Follow
+from .utils import (clear_caches,
+                    client_for,
+                    create_ingredients,
+                    create_recipe,
+                    create_tags,
+                    create_user)
+
+SUBSCRIPTIONS_URL = '/api/users/subscriptions/?limit=100'
+
+
+class SubscriptionsTest(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user('user')
+        self.tags = create_tags(1)
+        self.ingredients = create_ingredients(1)
+        self.authors = []
+        self.client = client_for(self.user)
+
+    def add_authors(self, count, recipes):
+        for _ in range(count):
+            author = create_user(f'author{len(self.authors)}')
+            for _ in range(recipes):
+                create_recipe(author, self.tags, self.ingredients)
+            Follow.objects.create(user=self.user, author=author)
+            self.authors.append(author)
+
+    def get(self, url=SUBSCRIPTIONS_URL):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_query_count_does_not_depend_on_authors_or_recipes(self):
+        self.add_authors(1, 1)
+        with CaptureQueriesContext(connection) as baseline:
+            self.get()
+        self.add_authors(5, 4)
+        for limit in ('', '&recipes_limit=2'):
+            with self.subTest(recipes_limit=limit):
+                with self.assertNumQueries(len(baseline)):
+                    results = self.get(SUBSCRIPTIONS_URL + limit)
+                self.assertEqual(len(results), 6)
+        with self.assertNumQueries(len(baseline) - 1):
+            self.get(SUBSCRIPTIONS_URL + '&recipes_limit=0')
+
+    def test_recipes_limit_caps_each_author(self):
+        self.add_authors(2, 3)
+        self.add_authors(1, 1)
+        authors = {author.id: author for author in self.authors}
+        for limit in (0, 1, 2, 5):
+            with self.subTest(recipes_limit=limit):
+                results = self.get(
+                    f'{SUBSCRIPTIONS_URL}&recipes_limit={limit}'
+                )
+                for result in results:
+                    recipes = authors[result['id']].recipes.order_by(
+                        '-pub_date', '-id'
+                    )
+                    self.assertEqual(
+                        [recipe['id'] for recipe in result['recipes']],
+                        list(recipes.values_list('id', flat=True)[:limit]),
+                    )
+                    self.assertEqual(result['recipes_count'], recipes.count())
@@ -0,0 +1,58 @@
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientAmount, Recipe, Tag
+from users.models import User
+
+
+def create_user(username):
+    return User.objects.create(
+        username=username,
+        email=f'{username}@example.com',
+        first_name='Имя',
+        last_name='Фамилия',
+    )
+
+
+def create_tags(count):
+    return [
+        Tag.objects.create(name=f'Тег {i}', color=f'#00000{i}', slug=f'tag{i}')
+        for i in range(count)
+    ]
+
+
+def create_ingredients(count):
+    return [
+        Ingredient.objects.create(name=f'Ингредиент {i}', measurement_unit='г')
+        for i in range(count)
+    ]
+
+
+def create_recipe(author, tags, ingredients, image='recipes/test.png',
+                  **fields):
+    fields.setdefault('name', 'Рецепт')
+    recipe = Recipe.objects.create(
+        author=author,
+        image=image,
+        text=fields.pop('text', 'Описание'),
+        cooking_time=fields.pop('cooking_time', 10),
+        **fields,
+    )
+    recipe.tags.set(tags)
+    IngredientAmount.objects.bulk_create(
+        IngredientAmount(recipe=recipe, ingredient=ingredient, amount=amount)
+        for amount, ingredient in enumerate(ingredients, 1)
+    )
+    return recipe
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+def client_for(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
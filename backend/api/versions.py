@@ -0,0 +1,33 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+RECIPES = 'recipes'
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+VERSION_KEY = 'data-version:{}'
+
+
+def viewer(user_id):
+    return f'viewer:{user_id}'
+
+
+def auth(user_id):
+    return f'auth:{user_id}'
+
+
+def get_version(name):
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), timeout=None)
+        version = cache.get(key, time.time())
+    return version
+
+
+def touch(*names):
+    transaction.on_commit(lambda: cache.set_many(
+        {VERSION_KEY.format(name): time.time() for name in names},
+        timeout=None,
+    ))
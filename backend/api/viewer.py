@@ -0,0 +1,67 @@
+from functools import cached_property
+
+from recipes.models import Favorites, ShoppingCart
+from users.models import Follow
+
+REQUEST_ATTR = '_viewer_state'
+
+
+class ViewerState:
+
+    def __init__(self, user=None, **known):
+        self.user = user
+        self.is_anonymous = user is None or user.is_anonymous
+        self.__dict__.update(known)
+
+    def _ids(self, queryset, field):
+        if self.is_anonymous:
+            return frozenset()
+        return frozenset(
+            queryset.filter(user=self.user).values_list(field, flat=True)
+        )
+
+    @cached_property
+    def favorites(self):
+        return self._ids(Favorites.objects, 'recipe_id')
+
+    @cached_property
+    def shopping_cart(self):
+        return self._ids(ShoppingCart.objects, 'recipe_id')
+
+    @cached_property
+    def subscriptions(self):
+        return self._ids(Follow.objects, 'author_id')
+
+    def is_favorited(self, recipe_id) -> bool:
+        return recipe_id in self.favorites
+
+    def is_in_shopping_cart(self, recipe_id) -> bool:
+        return recipe_id in self.shopping_cart
+
+    def is_subscribed(self, author_id) -> bool:
+        return author_id in self.subscriptions
+
+    @classmethod
+    def for_request(cls, request):
+        if request is None:
+            return cls()
+        state = getattr(request, REQUEST_ATTR, None)
+        if state is None:
+            state = cls(request.user)
+            setattr(request, REQUEST_ATTR, state)
+        return state
+
+
+def get_viewer(context):
+    viewer = context.get('viewer')
+    if viewer is None:
+        viewer = ViewerState.for_request(context.get('request'))
+    return viewer
+
+
+class ViewerContextMixin:
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['viewer'] = ViewerState.for_request(self.request)
+        return context
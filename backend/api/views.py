@@ -1,83 +1,230 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from recipes.models import (Favorites,
+from recipes.models import (ExportJob,
+                            Favorites,
                             Ingredient,
-                            IngredientAmount,
                             Recipe,
                             ShoppingCart,
                             Tag)
-from .filters import IngredientSearchFilter, RecipeFilter
-from .pagination import CustomPageNumberPagination
+from . import versions
+from .conditional import ConditionalGetMixin
+from .export_jobs import (ACTIVE_STATUSES,
+                          claimable_jobs,
+                          dispatch,
+                          enqueue_export,
+                          valid_jobs)
+from .feed import feed_rows
+from .filters import RecipeFilter
+from .ingredient_index import get_index
+from .pagination import (CursorPaginationMixin,
+                         CustomPageNumberPagination,
+                         FeedKeysetPagination,
+                         SearchKeysetPagination)
+from .payloads import accepts_gzip, ingredients_payload, tags_payload
 from .permissions import IsAuthorOrAdmin
-from .serializers import (FavoriteSerializer,
+from .relations import (delete_relations,
+                        delete_rows,
+                        insert_relations,
+                        recipe_relations_changed)
+from .rendering import RECIPE_PAGE_FIELDS, render_recipes
+from .serializers import (BulkRecipesSerializer,
                           IngredientSerializer,
                           RecipeListSerializer,
                           RecipeSerializer,
-                          ShoppingCartSerializer,
+                          ShortRecipeSerializer,
                           TagSerializer)
+from .shopping_list import (ExportContentNegotiation,
+                            export_response,
+                            file_response,
+                            shopping_list,
+                            validate_format)
+from .viewer import ViewerContextMixin
 
 
-class TagsViewSet(ReadOnlyModelViewSet):
+class StaticPayloadMixin(ConditionalGetMixin):
+    payload = None
+    cache_control = {
+        'public': True,
+        'max_age': settings.STATIC_PAYLOAD_MAX_AGE,
+    }
+
+    def get_etag_extra(self, request):
+        return ['gzip' if accepts_gzip(request) else 'identity']
+
+
+class TagsViewSet(StaticPayloadMixin, ReadOnlyModelViewSet):
+    data_versions = (versions.TAGS,)
     queryset = Tag.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return tags_payload.response(request)
 
-class IngredientsViewSet(ReadOnlyModelViewSet):
+
+class IngredientsViewSet(StaticPayloadMixin, ReadOnlyModelViewSet):
+    data_versions = (versions.INGREDIENTS,)
     queryset = Ingredient.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = IngredientSerializer
     pagination_class = None
-    filter_backends = [IngredientSearchFilter]
-    search_fields = ('^name',)
+    search_param = 'name'
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return ingredients_payload.response(request)
+        return Response(
+            get_index().search(query, settings.INGREDIENT_SEARCH_LIMIT)
+        )
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin,
+                    CursorPaginationMixin,
+                    ViewerContextMixin,
+                    ModelViewSet):
+    data_versions = (versions.RECIPES,)
+    viewer_dependent = True
     queryset = Recipe.objects.all()
     permission_classes = [IsAuthenticated, IsAuthorOrAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
     pagination_class = CustomPageNumberPagination
 
+    @cached_property
+    def latest_pub_date(self):
+        return Recipe.objects.aggregate(
+            pub_date=Max('pub_date')
+        )['pub_date']
+
+    def get_version_stamps(self, request):
+        stamps = super().get_version_stamps(request)
+        if self.latest_pub_date is not None:
+            stamps.append(self.latest_pub_date.timestamp())
+        return stamps
+
+    def get_cursor_pagination_class(self):
+        if self.request.query_params.get('search', '').strip():
+            return SearchKeysetPagination
+        return super().get_cursor_pagination_class()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(
+            *RECIPE_PAGE_FIELDS, *queryset.query.annotations
+        )
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            page = list(queryset)
+        data = render_recipes(
+            [row['id'] for row in page], self.get_serializer_context()
+        )
+        if self.paginator is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        return Response(
+            render_recipes([recipe.id], self.get_serializer_context())[0]
+        )
+
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return RecipeListSerializer
         return RecipeSerializer
 
     @staticmethod
-    def post_method_for_actions(request, pk, serializers):
-        data = {'user': request.user.id, 'recipe': pk}
-        serializer = serializers(data=data, context={'request': request})
-        serializer.is_valid()
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    def post_method_for_actions(request, pk, model, exists_message):
+        recipe = get_object_or_404(
+            Recipe.objects.only('id', 'name', 'image', 'cooking_time'), id=pk
+        )
+        with transaction.atomic():
+            added = insert_relations(model, request.user.id, 'recipe', [pk])
+            recipe_relations_changed(model, request.user.id, added, added=True)
+        if not added:
+            raise ValidationError({'status': exists_message})
+        return Response(
+            ShortRecipeSerializer(recipe, context={'request': request}).data,
+            status=status.HTTP_201_CREATED,
+        )
 
     @staticmethod
     def delete_method_for_actions(request, pk, model):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
-        model_obj = get_object_or_404(model, user=user, recipe=recipe)
-        model_obj.delete()
+        with transaction.atomic():
+            deleted = delete_relations(model, request.user.id, 'recipe', [pk])
+            if deleted:
+                recipe_relations_changed(
+                    model, request.user.id, [int(pk)], added=False
+                )
+        if not deleted:
+            raise NotFound
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @staticmethod
+    def bulk_post_method_for_actions(request, model):
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        user = request.user
+        existing = set(Recipe.objects.filter(
+            id__in=recipe_ids
+        ).values_list('id', flat=True))
+        with transaction.atomic():
+            added = insert_relations(model, user.id, 'recipe', existing)
+            recipe_relations_changed(model, user.id, added, added=True)
+        return Response({'results': [
+            {
+                'id': pk,
+                'status': (
+                    'added' if pk in added
+                    else 'exists' if pk in existing
+                    else 'not_found'
+                ),
+            }
+            for pk in recipe_ids
+        ]})
+
+    @staticmethod
+    def bulk_delete_method_for_actions(request, model):
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        user = request.user
+        with transaction.atomic():
+            rows = model.objects.select_for_update().filter(
+                user=user, recipe_id__in=recipe_ids
+            )
+            removed = set(rows.values_list('recipe_id', flat=True))
+            recipe_relations_changed(model, user.id, removed, added=False)
+            delete_rows(rows)
+        return Response({'results': [
+            {'id': pk, 'status': 'removed' if pk in removed else 'absent'}
+            for pk in recipe_ids
+        ]})
+
     @action(detail=True,
             methods=['POST'],
             permission_classes=[IsAuthenticated])
     def favorite(self, request, pk):
         return self.post_method_for_actions(
-            request=request, pk=pk, serializers=FavoriteSerializer
+            request=request,
+            pk=pk,
+            model=Favorites,
+            exists_message='Рецепт уже находится в избранном',
         )
 
     @favorite.mapping.delete
@@ -86,12 +233,26 @@ class RecipeViewSet(ModelViewSet):
             request=request, pk=pk, model=Favorites
         )
 
+    @action(detail=False,
+            methods=['POST'],
+            permission_classes=[IsAuthenticated],
+            url_path='favorite/bulk')
+    def favorite_bulk(self, request):
+        return self.bulk_post_method_for_actions(request, Favorites)
+
+    @favorite_bulk.mapping.delete
+    def delete_favorite_bulk(self, request):
+        return self.bulk_delete_method_for_actions(request, Favorites)
+
     @action(detail=True,
             methods=['POST'],
             permission_classes=[IsAuthenticated])
     def shopping_cart(self, request, pk):
         return self.post_method_for_actions(
-            request=request, pk=pk, serializers=ShoppingCartSerializer
+            request=request,
+            pk=pk,
+            model=ShoppingCart,
+            exists_message='Рецепт уже находится в списке покупок',
         )
 
     @shopping_cart.mapping.delete
@@ -100,50 +261,70 @@ class RecipeViewSet(ModelViewSet):
             request=request, pk=pk, model=ShoppingCart
         )
 
+    @action(detail=False,
+            methods=['POST'],
+            permission_classes=[IsAuthenticated],
+            url_path='shopping_cart/bulk')
+    def shopping_cart_bulk(self, request):
+        return self.bulk_post_method_for_actions(request, ShoppingCart)
+
+    @shopping_cart_bulk.mapping.delete
+    def delete_shopping_cart_bulk(self, request):
+        return self.bulk_delete_method_for_actions(request, ShoppingCart)
+
     @action(detail=False,
             methods=['GET'],
             permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        paginator = FeedKeysetPagination()
+        page = paginator.paginate_queryset(
+            feed_rows(request.user), request, self
+        )
+        return paginator.get_paginated_response(render_recipes(
+            [row['recipe_id'] for row in page], self.get_serializer_context()
+        ))
+
+    @action(detail=False,
+            methods=['GET'],
+            permission_classes=[IsAuthenticated],
+            content_negotiation_class=ExportContentNegotiation)
     def download_shopping_cart(self, request):
-        FONT_NAME = 'Handicraft'
-        FONT_SIZE_HEADER = 24
-        FONT_SIZE_ROW = 16
-        HEADER_HORIZONTAL_POS = 200
-        HEADER_VERTICAL_POS = 800
-        ROW_HORIZONTAL_POS = 75
-        ROW_VERTICAL_POS_START = 750
-        ROWS_SPACING = 25
-        HEADER = 'Список покупок'
-        ingredients = IngredientAmount.objects.filter(
-            recipe__shopping_cart__user=request.user
-        ).values(
-                'ingredient__name',
-                'ingredient__measurement_unit',
-        ).annotate(amount = Sum('amount'))
-
-        pdfmetrics.registerFont(
-            TTFont(FONT_NAME, f'data/{FONT_NAME}.ttf', 'UTF-8'))
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = ('attachment; '
-                                           'filename="shopping_list.pdf"')
-        page = canvas.Canvas(response)
-        page.setFont(FONT_NAME, size=FONT_SIZE_HEADER)
-        page.drawString(HEADER_HORIZONTAL_POS,
-                        HEADER_VERTICAL_POS,
-                        HEADER)
-        page.setFont(FONT_NAME, size=FONT_SIZE_ROW)
-        height = ROW_VERTICAL_POS_START
-        for i, data in enumerate(ingredients, 1):
-            page.drawString(
-                ROW_HORIZONTAL_POS,
-                height,
-                '{}. {} - {} {}'.format(
-                    i,
-                    data['ingredient__name'],
-                    data['amount'],
-                    data['ingredient__measurement_unit']
-                )
-            )
-            height -= ROWS_SPACING
-        page.showPage()
-        page.save()
-        return response
+        export_format = validate_format(request.query_params.get('format'))
+        if request.query_params.get('async') in ('1', 'true'):
+            job = enqueue_export(request.user, export_format)
+            return self.export_job_response(request, job)
+        return export_response(shopping_list(request.user), export_format)
+
+    @action(detail=False,
+            methods=['GET'],
+            permission_classes=[IsAuthenticated],
+            url_path=r'download_shopping_cart/(?P<job_id>\d+)',
+            content_negotiation_class=ExportContentNegotiation)
+    def download_shopping_cart_job(self, request, job_id):
+        job = get_object_or_404(
+            valid_jobs(), id=job_id, user=request.user
+        )
+        if job.status == ExportJob.DONE:
+            return file_response(job.file.open('rb'), job.format)
+        if claimable_jobs().filter(id=job.id).exists():
+            dispatch()
+        return self.export_job_response(request, job)
+
+    @staticmethod
+    def export_job_response(request, job):
+        url = request.build_absolute_uri(
+            reverse('recipes-download-shopping-cart-job', args=[job.id])
+        )
+        data = {
+            'id': job.id,
+            'status': job.status,
+            'format': job.format,
+            'url': url,
+        }
+        if job.status == ExportJob.FAILED:
+            data['error'] = job.error
+        if job.status not in ACTIVE_STATUSES:
+            return Response(data)
+        return Response(
+            data, status=status.HTTP_202_ACCEPTED, headers={'Location': url}
+        )
@@ -0,0 +1,35 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                thread_name_prefix='foodgram-worker',
+            )
+        return _executor
+
+
+def run(function, args):
+    try:
+        function(*args)
+    except Exception:
+        logger.exception('Фоновая задача %s завершилась с ошибкой', function)
+    finally:
+        connection.close()
+
+
+def submit(function, *args):
+    return get_executor().submit(run, function, args)
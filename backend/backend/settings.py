@@ -78,6 +78,24 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    },
+    'recipes': {
+        'BACKEND': os.getenv(
+            'RECIPE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('RECIPE_CACHE_LOCATION', 'recipes'),
+        'TIMEOUT': int(os.getenv('RECIPE_CACHE_TIMEOUT', 60 * 60)),
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -117,7 +135,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6
@@ -139,3 +157,33 @@ DJOSER = {
 }
 
 AUTH_USER_MODEL = 'users.User'
+
+RECIPE_RENDER_CACHE = 'recipes'
+
+RECIPE_FAST_RENDER = os.getenv('RECIPE_FAST_RENDER', 'False') == 'True'
+
+INGREDIENT_SEARCH_LIMIT = 20
+
+STATIC_PAYLOAD_MAX_AGE = 60 * 60 * 24
+
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+
+EXPORT_MAX_PENDING = int(os.getenv('EXPORT_MAX_PENDING', 100))
+EXPORT_RESULT_TTL = int(os.getenv('EXPORT_RESULT_TTL', 60 * 60))
+EXPORT_JOB_TIMEOUT = int(os.getenv('EXPORT_JOB_TIMEOUT', 10 * 60))
+EXPORT_MAX_ATTEMPTS = int(os.getenv('EXPORT_MAX_ATTEMPTS', 3))
+
+BULK_ACTION_LIMIT = 100
+
+SUBSCRIPTION_RECIPES_LIMIT = 20
+
+FEED_TIMELINE_THRESHOLD = int(os.getenv('FEED_TIMELINE_THRESHOLD', 1000))
+
+TOKEN_CACHE_ENABLED = os.getenv('TOKEN_CACHE_ENABLED', 'True') == 'True'
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 60))
+
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', 5 * 1024 * 1024)
+)
+DATA_UPLOAD_MAX_MEMORY_SIZE = RECIPE_IMAGE_MAX_SIZE * 4 // 3 + 64 * 1024
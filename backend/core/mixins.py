@@ -0,0 +1,33 @@
+from django.db import DatabaseError, transaction
+
+
+class CounterFieldsMixin:
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            self._state.adding
+            or kwargs.get('update_fields') is not None
+            or self.get_deferred_fields()
+        ):
+            super().save(*args, **kwargs)
+            return
+        using = kwargs.get('using') or self._state.db
+        update_fields = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.counter_fields
+        ]
+        try:
+            with transaction.atomic(using=using):
+                super().save(*args, update_fields=update_fields, **kwargs)
+        except DatabaseError as error:
+            # The row was deleted concurrently: fall back to a full save,
+            # which inserts it again like a plain Model.save() would.
+            if (
+                type(error) is not DatabaseError
+                or type(self)._base_manager.using(using).filter(
+                    pk=self.pk
+                ).exists()
+            ):
+                raise
+            super().save(*args, **kwargs)
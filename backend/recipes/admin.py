@@ -39,7 +39,7 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @staticmethod
     def amount_favorites(obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
     @staticmethod
     def amount_tags(obj):
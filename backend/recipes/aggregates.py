@@ -0,0 +1,84 @@
+from collections import Counter
+
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import IngredientAmount, ShoppingCart, ShoppingListItem
+
+
+def recipe_ingredients(recipe_ids):
+    totals = Counter()
+    for ingredient_id, amount in IngredientAmount.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('ingredient_id', 'amount'):
+        totals[ingredient_id] += amount
+    return totals
+
+
+def apply_deltas(user_ids, deltas):
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(user_id=user_id, ingredient_id=pk, amount=0)
+            for user_id in user_ids
+            for pk, delta in deltas.items() if delta > 0
+        ),
+        ignore_conflicts=True,
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas
+    )
+    items.update(amount=F('amount') + Case(
+        *(When(ingredient_id=pk, then=Value(delta))
+          for pk, delta in deltas.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    ))
+    items.filter(amount__lte=0).delete()
+
+
+def cart_changed(user_id, recipe_ids, added):
+    totals = recipe_ingredients(recipe_ids)
+    sign = 1 if added else -1
+    apply_deltas([user_id], {
+        pk: sign * amount for pk, amount in totals.items()
+    })
+
+
+def recipe_ingredients_changed(recipe_id, old_totals, new_totals):
+    apply_deltas(
+        ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True),
+        {
+            pk: new_totals.get(pk, 0) - old_totals.get(pk, 0)
+            for pk in set(new_totals) | set(old_totals)
+        },
+    )
+
+
+def expected_totals(user_ids=None):
+    if user_ids is None:
+        carts = {'recipe__shopping_cart__isnull': False}
+    else:
+        carts = {'recipe__shopping_cart__user__in': list(user_ids)}
+    return {
+        (user_id, ingredient_id): total
+        for user_id, ingredient_id, total in IngredientAmount.objects.filter(
+            **carts
+        ).values_list(
+            'recipe__shopping_cart__user', 'ingredient'
+        ).annotate(total=Sum('amount')).order_by()
+    }
+
+
+def actual_totals():
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in
+        ShoppingListItem.objects.values_list('user', 'ingredient', 'amount')
+    }
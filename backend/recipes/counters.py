@@ -0,0 +1,65 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Follow, User
+from .models import Favorites, Recipe
+
+
+def adjust(model, field, ids, added):
+    steps = defaultdict(list)
+    for pk, times in Counter(ids).items():
+        steps[times if added else -times].append(pk)
+    for step, pks in steps.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + step})
+
+
+def count_favorites(recipe_ids, added):
+    adjust(Recipe, 'favorites_count', recipe_ids, added)
+
+
+def count_recipes(author_ids, added):
+    adjust(User, 'recipes_count', author_ids, added)
+
+
+def count_followers(author_ids, added):
+    adjust(User, 'followers_count', author_ids, added)
+
+
+def count_of(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+COUNTERS = {
+    (Recipe, 'favorites_count'): (Favorites, 'recipe'),
+    (User, 'recipes_count'): (Recipe, 'author'),
+    (User, 'followers_count'): (Follow, 'author'),
+}
+
+
+def counter_drift():
+    drift = []
+    for (model, field), source in COUNTERS.items():
+        rows = model.objects.annotate(actual=count_of(*source)).exclude(
+            **{field: F('actual')}
+        ).values_list('pk', field, 'actual')
+        drift.extend(
+            (model, field, pk, stored, actual)
+            for pk, stored, actual in rows
+        )
+    return drift
+
+
+def recount(drift):
+    stale = defaultdict(list)
+    for model, field, pk, stored, actual in drift:
+        stale[model, field].append(pk)
+    for (model, field), pks in stale.items():
+        model.objects.filter(pk__in=pks).update(
+            **{field: count_of(*COUNTERS[model, field])}
+        )
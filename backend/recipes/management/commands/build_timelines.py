@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from recipes.models import Timeline
+from recipes.timeline import build_timeline, drop_timeline
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Перестраивает ленты подписок пользователей, подписанных на '
+            'много авторов, и удаляет ленты остальных')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold',
+            type=int,
+            default=settings.FEED_TIMELINE_THRESHOLD,
+            help='Минимальное число подписок для отдельной ленты',
+        )
+
+    def handle(self, *args, **options):
+        heavy = set(User.objects.annotate(
+            following=Count('follower')
+        ).filter(
+            following__gte=options['threshold']
+        ).values_list('id', flat=True))
+        stale = set(Timeline.objects.exclude(
+            user_id__in=heavy
+        ).values_list('user_id', flat=True))
+        for user_id in sorted(heavy):
+            with transaction.atomic():
+                build_timeline(user_id)
+        for user_id in sorted(stale):
+            with transaction.atomic():
+                drop_timeline(user_id)
+        self.stdout.write(
+            f'Лент построено: {len(heavy)}, удалено: {len(stale)}'
+        )
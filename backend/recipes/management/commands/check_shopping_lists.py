@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.aggregates import actual_totals, expected_totals
+from recipes.models import ShoppingListItem
+
+REPORT_LIMIT = 20
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает списки покупок с нуля и сообщает о расхождениях '
+            'с сохраненными суммами')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только сообщить о расхождениях, не перестраивая таблицу',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            expected = expected_totals()
+            actual = actual_totals()
+            drift = sorted(
+                key for key in set(expected) | set(actual)
+                if expected.get(key) != actual.get(key)
+            )
+            for user_id, ingredient_id in drift[:REPORT_LIMIT]:
+                self.stdout.write(
+                    f'пользователь {user_id}, ингредиент {ingredient_id}: '
+                    f'ожидалось {expected.get((user_id, ingredient_id))}, '
+                    f'сохранено {actual.get((user_id, ingredient_id))}'
+                )
+            self.stdout.write(f'Расхождений: {len(drift)}')
+            if options['dry_run'] or not drift:
+                return
+            ShoppingListItem.objects.all().delete()
+            ShoppingListItem.objects.bulk_create(
+                (
+                    ShoppingListItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        amount=amount,
+                    )
+                    for (user_id, ingredient_id), amount in expected.items()
+                ),
+                batch_size=1000,
+            )
+            self.stdout.write(f'Таблица перестроена: {len(expected)} позиций')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import counter_drift, recount
+
+REPORT_LIMIT = 20
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счетчики избранного, рецептов и подписчиков '
+            'и сообщает о расхождениях')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только сообщить о расхождениях, не исправляя счетчики',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = counter_drift()
+            for model, field, pk, stored, actual in drift[:REPORT_LIMIT]:
+                self.stdout.write(
+                    f'{model._meta.label} {pk}, {field}: '
+                    f'сохранено {stored}, фактически {actual}'
+                )
+            self.stdout.write(f'Расхождений: {len(drift)}')
+            if options['dry_run'] or not drift:
+                return
+            recount(drift)
+            self.stdout.write('Счетчики исправлены')
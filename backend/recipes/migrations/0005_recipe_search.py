@@ -0,0 +1,70 @@
+from django.db import migrations
+
+POSTGRES_CREATE = (
+    'CREATE TABLE recipes_recipe_search ('
+    'recipe_id bigint PRIMARY KEY '
+    'REFERENCES recipes_recipe (id) ON DELETE CASCADE, '
+    'document tsvector NOT NULL)',
+    'CREATE INDEX recipes_recipe_search_document_idx '
+    'ON recipes_recipe_search USING GIN (document)',
+)
+POSTGRES_BACKFILL = '''
+    INSERT INTO recipes_recipe_search (recipe_id, document)
+    SELECT recipe.id,
+           setweight(to_tsvector(%s, recipe.name), 'A')
+           || setweight(to_tsvector(
+               %s, coalesce(string_agg(ingredient.name, ' '), '')
+           ), 'B')
+           || setweight(to_tsvector(%s, recipe.text), 'C')
+    FROM recipes_recipe recipe
+    LEFT JOIN recipes_ingredientamount amount
+        ON amount.recipe_id = recipe.id
+    LEFT JOIN recipes_ingredient ingredient
+        ON ingredient.id = amount.ingredient_id
+    GROUP BY recipe.id
+'''
+POSTGRES_CONFIG = 'russian'
+SQLITE_CREATE = (
+    'CREATE VIRTUAL TABLE recipes_recipe_search USING fts5('
+    'name, ingredients, text, '
+    "tokenize = 'unicode61 remove_diacritics 2')",
+)
+SQLITE_BACKFILL = '''
+    INSERT INTO recipes_recipe_search (rowid, name, ingredients, text)
+    SELECT recipe.id,
+           recipe.name,
+           coalesce(group_concat(ingredient.name, ' '), ''),
+           recipe.text
+    FROM recipes_recipe recipe
+    LEFT JOIN recipes_ingredientamount amount
+        ON amount.recipe_id = recipe.id
+    LEFT JOIN recipes_ingredient ingredient
+        ON ingredient.id = amount.ingredient_id
+    GROUP BY recipe.id
+'''
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_CREATE:
+            schema_editor.execute(statement)
+        schema_editor.execute(POSTGRES_BACKFILL, [POSTGRES_CONFIG] * 3)
+        return
+    for statement in SQLITE_CREATE:
+        schema_editor.execute(statement)
+    schema_editor.execute(SQLITE_BACKFILL)
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute('DROP TABLE recipes_recipe_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,6 +1,7 @@
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from core.mixins import CounterFieldsMixin
 from users.models import User
 
 MIN_COOKING_TIME_MINUTES = 1
@@ -55,12 +56,13 @@ class Ingredient(models.Model):
         return '{}, {}'.format(self.name, self.measurement_unit)
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
         on_delete=models.CASCADE,
         related_name='recipes',
+        db_index=False,
     )
     name = models.CharField(
         'Название рецепта',
@@ -70,6 +72,11 @@ class Recipe(models.Model):
         'Изображение',
         upload_to='recipes/',
     )
+    image_variants = models.JSONField(
+        'Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+    )
     text = models.TextField(
         'Описание рецепта',
     )
@@ -97,11 +104,28 @@ class Recipe(models.Model):
         'Дата публикации',
         auto_now_add=True,
     )
+    favorites_count = models.IntegerField(
+        'В избранном',
+        default=0,
+        editable=False,
+    )
+
+    counter_fields = ('favorites_count',)
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Рецепт',
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_feed_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_feed_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return str(self.name)
@@ -191,3 +215,167 @@ class ShoppingCart(models.Model):
                 name='unique shopping cart',
             ),
         ]
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+    )
+    amount = models.IntegerField(
+        'Общее количество',
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique shopping list item',
+            ),
+        ]
+
+
+class ExportJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+    )
+    format = models.CharField(
+        'Формат',
+        max_length=10,
+    )
+    fingerprint = models.CharField(
+        'Отпечаток списка покупок',
+        max_length=40,
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    file = models.FileField(
+        'Файл',
+        upload_to='exports/',
+        blank=True,
+    )
+    error = models.TextField(
+        'Ошибка',
+        blank=True,
+    )
+    created = models.DateTimeField(
+        'Создано',
+        auto_now_add=True,
+    )
+    finished = models.DateTimeField(
+        'Завершено',
+        null=True,
+        blank=True,
+    )
+    claim = models.CharField(
+        'Метка обработчика',
+        max_length=32,
+        blank=True,
+    )
+    claimed = models.DateTimeField(
+        'Взято в работу',
+        null=True,
+        blank=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Попыток',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Выгрузка списка покупок'
+        verbose_name_plural = 'Выгрузки списков покупок'
+        indexes = [
+            models.Index(
+                fields=['user', 'format', 'fingerprint'],
+                name='export_job_dedupe_idx',
+            ),
+            models.Index(
+                fields=['status', 'created'],
+                name='export_job_status_idx',
+            ),
+        ]
+
+
+class Timeline(models.Model):
+    user = models.OneToOneField(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='timeline',
+    )
+    ready = models.BooleanField(
+        'Заполнена',
+        default=False,
+    )
+    created = models.DateTimeField(
+        'Создана',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Лента подписок'
+        verbose_name_plural = 'Ленты подписок'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    pub_date = models.DateTimeField(
+        'Дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи лент подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique timeline entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='timeline_feed_idx',
+            ),
+        ]
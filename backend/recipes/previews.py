@@ -0,0 +1,30 @@
+from collections import defaultdict
+
+from .models import Recipe
+
+PREVIEWS_SQL = '''
+    SELECT id, author_id, name, image, cooking_time
+    FROM (
+        SELECT id, author_id, name, image, cooking_time, pub_date,
+               ROW_NUMBER() OVER (
+                   PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+               ) AS position
+        FROM recipes_recipe
+        WHERE author_id IN ({})
+    ) ranked
+    WHERE position <= %s
+    ORDER BY author_id, pub_date DESC, id DESC
+'''
+
+
+def latest_recipes(author_ids, limit):
+    author_ids = list(author_ids)
+    previews = defaultdict(list)
+    if not author_ids or limit <= 0:
+        return previews
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    for recipe in Recipe.objects.raw(
+        PREVIEWS_SQL.format(placeholders), [*author_ids, limit]
+    ):
+        previews[recipe.author_id].append(recipe)
+    return previews
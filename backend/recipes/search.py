@@ -0,0 +1,126 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'recipes_recipe_search'
+SEARCH_CONFIG = 'russian'
+SQLITE_WEIGHTS = (10.0, 5.0, 1.0)
+INDEX_BATCH_SIZE = 500
+RANK_ANNOTATION = 'search_rank'
+
+POSTGRES_INDEX_SQL = f'''
+    INSERT INTO {SEARCH_TABLE} (recipe_id, document)
+    SELECT recipe.id,
+           setweight(to_tsvector(%(config)s, recipe.name), 'A')
+           || setweight(to_tsvector(
+               %(config)s, coalesce(string_agg(ingredient.name, ' '), '')
+           ), 'B')
+           || setweight(to_tsvector(%(config)s, recipe.text), 'C')
+    FROM recipes_recipe recipe
+    LEFT JOIN recipes_ingredientamount amount
+        ON amount.recipe_id = recipe.id
+    LEFT JOIN recipes_ingredient ingredient
+        ON ingredient.id = amount.ingredient_id
+    WHERE recipe.id = ANY(%(ids)s)
+    GROUP BY recipe.id
+    ON CONFLICT (recipe_id) DO UPDATE SET document = EXCLUDED.document
+'''
+SQLITE_INDEX_SQL = f'''
+    INSERT INTO {SEARCH_TABLE} (rowid, name, ingredients, text)
+    SELECT recipe.id,
+           recipe.name,
+           coalesce(group_concat(ingredient.name, ' '), ''),
+           recipe.text
+    FROM recipes_recipe recipe
+    LEFT JOIN recipes_ingredientamount amount
+        ON amount.recipe_id = recipe.id
+    LEFT JOIN recipes_ingredient ingredient
+        ON ingredient.id = amount.ingredient_id
+    WHERE recipe.id IN ({{}})
+    GROUP BY recipe.id
+'''
+
+
+def is_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def batches(recipe_ids):
+    recipe_ids = sorted(set(recipe_ids))
+    for start in range(0, len(recipe_ids), INDEX_BATCH_SIZE):
+        yield recipe_ids[start:start + INDEX_BATCH_SIZE]
+
+
+def index_recipes(recipe_ids):
+    with connection.cursor() as cursor:
+        for batch in batches(recipe_ids):
+            if is_postgresql():
+                cursor.execute(
+                    POSTGRES_INDEX_SQL, {'config': SEARCH_CONFIG, 'ids': batch}
+                )
+                continue
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})',
+                batch,
+            )
+            cursor.execute(SQLITE_INDEX_SQL.format(placeholders), batch)
+
+
+def unindex_recipes(recipe_ids):
+    column = 'recipe_id' if is_postgresql() else 'rowid'
+    with connection.cursor() as cursor:
+        for batch in batches(recipe_ids):
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} '
+                f'WHERE {column} IN ({placeholders})',
+                batch,
+            )
+
+
+def match_expression(query):
+    tokens = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_recipes(queryset, query):
+    if is_postgresql():
+        tsquery = 'websearch_to_tsquery(%s, %s)'
+        params = (SEARCH_CONFIG, query)
+        matches = RawSQL(
+            f'SELECT recipe_id FROM {SEARCH_TABLE} '
+            f'WHERE document @@ {tsquery}',
+            params,
+        )
+        rank = RawSQL(
+            f'SELECT ts_rank(document, {tsquery})::float8 '
+            f'FROM {SEARCH_TABLE} '
+            f'WHERE recipe_id = recipes_recipe.id',
+            params,
+            output_field=FloatField(),
+        )
+    else:
+        match = match_expression(query)
+        if not match:
+            return queryset.annotate(**{
+                RANK_ANNOTATION: Value(0.0, output_field=FloatField())
+            }).none()
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        matches = RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s',
+            (match,),
+        )
+        rank = RawSQL(
+            f'SELECT -bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            f'AND rowid = recipes_recipe.id',
+            (match,),
+            output_field=FloatField(),
+        )
+    return queryset.filter(id__in=matches).annotate(**{
+        RANK_ANNOTATION: rank
+    }).order_by('-' + RANK_ANNOTATION, '-pub_date', '-id')
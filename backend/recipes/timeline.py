@@ -0,0 +1,61 @@
+from django.db import connection
+
+from users.models import Follow
+from .models import Timeline, TimelineEntry
+
+FAN_OUT_SQL = '''
+    INSERT INTO recipes_timelineentry (user_id, recipe_id, pub_date)
+    SELECT follow.user_id, recipe.id, recipe.pub_date
+    FROM recipes_recipe recipe
+    JOIN users_follow follow ON follow.author_id = recipe.author_id
+    JOIN recipes_timeline timeline ON timeline.user_id = follow.user_id
+    WHERE {}
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+'''
+
+
+def fan_out(condition, params):
+    with connection.cursor() as cursor:
+        cursor.execute(FAN_OUT_SQL.format(condition), params)
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def recipes_published(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if recipe_ids:
+        fan_out(f'recipe.id IN ({placeholders(recipe_ids)})', recipe_ids)
+
+
+def follows_changed(user_id, author_ids, added):
+    author_ids = list(author_ids)
+    if not author_ids or not Timeline.objects.filter(user_id=user_id).exists():
+        return
+    if added:
+        fan_out(
+            'follow.user_id = %s '
+            f'AND recipe.author_id IN ({placeholders(author_ids)})',
+            [user_id, *author_ids],
+        )
+        return
+    TimelineEntry.objects.filter(
+        user_id=user_id, recipe__author_id__in=author_ids
+    ).delete()
+
+
+def build_timeline(user_id):
+    Timeline.objects.get_or_create(user_id=user_id)
+    TimelineEntry.objects.filter(user_id=user_id).exclude(
+        recipe__author_id__in=Follow.objects.filter(
+            user_id=user_id
+        ).values('author_id')
+    ).delete()
+    fan_out('follow.user_id = %s', [user_id])
+    Timeline.objects.filter(user_id=user_id).update(ready=True)
+
+
+def drop_timeline(user_id):
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    Timeline.objects.filter(user_id=user_id).delete()
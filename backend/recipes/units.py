@@ -0,0 +1,38 @@
+from django.db.models import Case, CharField, F, IntegerField, Value, When
+
+UNIT_CONVERSIONS = {
+    'кг': ('г', 1000),
+    'л': ('мл', 1000),
+}
+DISPLAY_RULES = {
+    'г': ('кг', 1000, 2),
+    'мл': ('л', 1000, 2),
+}
+
+
+def base_unit(unit_field):
+    return Case(
+        *(When(**{unit_field: unit}, then=Value(base))
+          for unit, (base, factor) in UNIT_CONVERSIONS.items()),
+        default=F(unit_field),
+        output_field=CharField(),
+    )
+
+
+def base_amount(amount_field, unit_field):
+    return F(amount_field) * Case(
+        *(When(**{unit_field: unit}, then=Value(factor))
+          for unit, (base, factor) in UNIT_CONVERSIONS.items()),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def display_amount(amount, unit):
+    if unit not in DISPLAY_RULES:
+        return amount, unit
+    display_unit, factor, digits = DISPLAY_RULES[unit]
+    if amount < factor:
+        return amount, unit
+    amount = round(amount / factor, digits)
+    return int(amount) if amount.is_integer() else amount, display_unit
@@ -11,6 +11,8 @@ class UserAdmin(admin.ModelAdmin):
         'username',
         'first_name',
         'last_name',
+        'recipes_count',
+        'followers_count',
     )
     search_fields = (
         'username',
@@ -4,6 +4,8 @@ from django.contrib.auth.models import (AbstractBaseUser,
                                         UserManager)
 from django.db import models
 
+from core.mixins import CounterFieldsMixin
+
 
 class CustomUserManager(BaseUserManager):
     def create_superuser(self,
@@ -50,7 +52,7 @@ class CustomUserManager(BaseUserManager):
         return user
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(CounterFieldsMixin, AbstractBaseUser, PermissionsMixin):
     username = models.CharField(
         'Имя пользователя',
         max_length=100,
@@ -72,8 +74,19 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_acitve = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=True)
     is_admin = models.BooleanField(default=True)
+    recipes_count = models.IntegerField(
+        'Число рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.IntegerField(
+        'Число подписчиков',
+        default=0,
+        editable=False,
+    )
 
     objects = UserManager()
+    counter_fields = ('recipes_count', 'followers_count')
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email', 'first_name', 'last_name']
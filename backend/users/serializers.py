@@ -1,8 +1,11 @@
+from django.conf import settings
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
 
+from api.viewer import get_viewer
 from recipes.models import Recipe
-from .models import Follow, User
+from recipes.previews import latest_recipes
+from .models import User
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -46,10 +49,7 @@ class CustomUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return Follow.objects.filter(user=user, author=obj.id).exists()
+        return get_viewer(self.context).is_subscribed(obj.id)
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
@@ -64,9 +64,24 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
         )
 
 
+def recipes_limit(request):
+    value = request.query_params.get('recipes_limit') if request else None
+    if value in (None, ''):
+        return settings.SUBSCRIPTION_RECIPES_LIMIT
+    try:
+        limit = int(value)
+        if limit < 0:
+            raise ValueError
+    except ValueError:
+        raise serializers.ValidationError(
+            {'recipes_limit': 'Ожидается целое неотрицательное число'}
+        )
+    return min(limit, settings.SUBSCRIPTION_RECIPES_LIMIT)
+
+
 class FollowSerializer(CustomUserSerializer):
     recipes = serializers.SerializerMethodField(read_only=True)
-    recipes_count = serializers.SerializerMethodField(read_only=True)
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -81,14 +96,10 @@ class FollowSerializer(CustomUserSerializer):
             'recipes_count',
         )
 
-    @staticmethod
-    def get_recipes_count(obj) -> int:
-        return obj.recipes.count()
-
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes = obj.recipes.all()
-        recipes_limit = request.query_params.get('recipes_limit')
-        if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
-        return ShortRecipeSerializer(recipes, many=True).data
+        previews = self.context.get('recipe_previews')
+        if previews is None:
+            previews = latest_recipes(
+                [obj.id], recipes_limit(self.context.get('request'))
+            )
+        return ShortRecipeSerializer(previews.get(obj.id, []), many=True).data
@@ -1,3 +1,4 @@
+from django.db import transaction
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.generics import ListAPIView, get_object_or_404
@@ -5,12 +6,19 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from api.pagination import CustomPageNumberPagination
+from api.pagination import (CursorPaginationMixin,
+                            CustomPageNumberPagination,
+                            FollowKeysetPagination)
+from api.relations import delete_relations, follow_changed, insert_relations
+from api.viewer import ViewerContextMixin, ViewerState
+from recipes.previews import latest_recipes
 from .models import Follow, User
-from .serializers import CustomUserSerializer, FollowSerializer
+from .serializers import (CustomUserSerializer,
+                          FollowSerializer,
+                          recipes_limit)
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(ViewerContextMixin, UserViewSet):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = [IsAuthenticated]
@@ -22,48 +30,75 @@ class FollowViewSet(APIView):
     pagination_class = CustomPageNumberPagination
 
     def post(self, request, *args, **kwargs):
+        limit = recipes_limit(request)
         author = get_object_or_404(User, id=self.kwargs.get('user_id'))
         if author.id == request.user.id:
             return Response(
                 {'error': 'Нельзя подписаться на самого себя'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        if Follow.objects.filter(
-            user=request.user,
-            author_id=author.id
-        ).exists():
+        with transaction.atomic():
+            added = insert_relations(
+                Follow, request.user.id, 'author', [author.id]
+            )
+            follow_changed(request.user.id, added, added=True)
+        if not added:
             return Response(
                 {'error': 'Вы уже подписаны на автора'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        Follow.objects.create(
-            user=request.user,
-            author_id=author.id
-        )
+        viewer = ViewerState(request.user, subscriptions=frozenset(added))
         return Response(
-            self.serializer_class(author, context={'request': request}).data,
+            self.serializer_class(author, context={
+                'request': request,
+                'viewer': viewer,
+                'recipe_previews': latest_recipes([author.id], limit),
+            }).data,
             status=status.HTTP_201_CREATED
         )
 
     def delete(self, request, *args, **kwargs):
-        user = get_object_or_404(User, id=self.kwargs.get('user_id'))
-        subscription = Follow.objects.filter(
-            user=request.user,
-            author_id=user.id
-        )
-        if subscription:
-            subscription.delete()
+        author_id = self.kwargs.get('user_id')
+        with transaction.atomic():
+            deleted = delete_relations(
+                Follow, request.user.id, 'author', [author_id]
+            )
+            if deleted:
+                follow_changed(request.user.id, [author_id], added=False)
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(User, id=author_id)
         return Response(
             {'error': 'Вы не подписаны на автора'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
 
-class FollowListView(ListAPIView):
+class FollowListView(CursorPaginationMixin,
+                     ViewerContextMixin,
+                     ListAPIView):
     serializer_class = FollowSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPageNumberPagination
+    cursor_pagination_class = FollowKeysetPagination
 
     def get_queryset(self):
-        return User.objects.filter(followed__user=self.request.user)
+        return User.objects.filter(
+            followed__user=self.request.user
+        ).order_by('id')
+
+    def list(self, request, *args, **kwargs):
+        limit = recipes_limit(request)
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        authors = list(queryset) if page is None else page
+        author_ids = [author.id for author in authors]
+        context = self.get_serializer_context()
+        context['viewer'] = ViewerState(
+            request.user, subscriptions=frozenset(author_ids)
+        )
+        context['recipe_previews'] = latest_recipes(author_ids, limit)
+        serializer = self.get_serializer(authors, many=True, context=context)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)